@@ -1,45 +1,73 @@
 """Check HRV data availability and chart requirements."""
+import sys
+from contextlib import nullcontext
 from datetime import date, timedelta
 from app.data.db import get_session
 from app.models.tables import DailyMetric
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
 
-def analyze_hrv_coverage():
-    with get_session() as session:
+def analyze_hrv_coverage(athlete_id: int = 1, session: Session | None = None):
+    # Reuse the caller's session when looping over athletes; otherwise open
+    # (and close) one here. Avoids a pool checkout + pre-ping per athlete.
+    with (nullcontext(session) if session is not None else get_session()) as session:
         # Get last 90 days
         end = date.today()
         start = end - timedelta(days=90)
-        
-        stmt = select(DailyMetric).where(
-            DailyMetric.athlete_id == 1,
+
+        # Count coverage server-side instead of hydrating every row into Python
+        counts_stmt = select(
+            func.count().filter(DailyMetric.hrv.isnot(None)),
+            func.count().filter(DailyMetric.rhr.isnot(None)),
+            func.count(),
+        ).where(
+            DailyMetric.athlete_id == athlete_id,
+            DailyMetric.date >= start
+        )
+        hrv_count, rhr_count, total_count = session.execute(counts_stmt).one()
+
+        # Only the first 10 HRV dates are ever displayed
+        hrv_dates = session.scalars(
+            select(DailyMetric.date).where(
+                DailyMetric.athlete_id == athlete_id,
+                DailyMetric.date >= start,
+                DailyMetric.hrv.isnot(None)
+            ).order_by(DailyMetric.date.desc()).limit(10)
+        ).all()
+
+        # Stream bare column tuples for the listing; no ORM mapper overhead
+        stmt = select(
+            DailyMetric.date, DailyMetric.hrv, DailyMetric.rhr, DailyMetric.sleep_hours
+        ).where(
+            DailyMetric.athlete_id == athlete_id,
             DailyMetric.date >= start
         ).order_by(DailyMetric.date.desc())
-        
-        metrics = session.scalars(stmt).all()
 
-        print(f"Total daily_metrics records found: {len(metrics)}")
-        hrv_values = [m.hrv for m in metrics if m.hrv is not None]
-        
-        hrv_dates = [m.date for m in metrics if m.hrv is not None]
-        rhr_dates = [m.date for m in metrics if m.rhr is not None]
+        print(f"Total daily_metrics records found: {total_count}")
+
+        # Build the listing in one buffer and write it with a single syscall
+        # instead of one print per row
+        sys.stdout.write(
+            "\n".join(
+                f"{d} | HRV: {hrv or 'NULL'} | RHR: {rhr or 'NULL'} | Sleep: {sleep or 'NULL'}"
+                for d, hrv, rhr, sleep in session.execute(stmt).yield_per(500)
+            ) + "\n"
+        )
 
-        for m in metrics:
-            print(f"{m.date} | HRV: {m.hrv or 'NULL'} | RHR: {m.rhr or 'NULL'} | Sleep: {m.sleep_hours or 'NULL'}")
-        
         print("=" * 60)
         print("HRV DATA COVERAGE ANALYSIS")
         print("=" * 60)
         print(f"\n📊 Last 90 days: {start} to {end}")
-        print(f"Total daily_metrics records: {len(metrics)}")
-        print(f"\n✅ RHR data: {len(rhr_dates)}/{len(metrics)} days ({100*len(rhr_dates)/len(metrics):.1f}%)")
-        print(f"{'⚠️' if len(hrv_dates) < 7 else '✅'} HRV data: {len(hrv_dates)}/{len(metrics)} days ({100*len(hrv_dates)/len(metrics) if metrics else 0:.1f}%)")
-        
+        print(f"Total daily_metrics records: {total_count}")
+        print(f"\n✅ RHR data: {rhr_count}/{total_count} days ({100*rhr_count/total_count:.1f}%)")
+        print(f"{'⚠️' if hrv_count < 7 else '✅'} HRV data: {hrv_count}/{total_count} days ({100*hrv_count/total_count if total_count else 0:.1f}%)")
+
         if hrv_dates:
             print(f"\n📅 Dates with HRV data:")
-            for d in hrv_dates[:10]:  # Show first 10
+            for d in hrv_dates:  # Query already limited to first 10
                 print(f"   - {d}")
-            if len(hrv_dates) > 10:
-                print(f"   ... and {len(hrv_dates) - 10} more")
+            if hrv_count > 10:
+                print(f"   ... and {hrv_count - 10} more")
         else:
             print(f"\n❌ No HRV data found!")
         
@@ -47,29 +75,29 @@ def analyze_hrv_coverage():
         print("CHART REQUIREMENTS")
         print("=" * 60)
         print(f"Minimum for charts: 7 days of data")
-        print(f"Current HRV data: {len(hrv_dates)} days")
+        print(f"Current HRV data: {hrv_count} days")
         
-        if len(hrv_dates) < 7:
-            print(f"\n⚠️  Need {7 - len(hrv_dates)} more days of HRV data for charts to display")
+        if hrv_count < 7:
+            print(f"\n⚠️  Need {7 - hrv_count} more days of HRV data for charts to display")
             print(f"\n💡 SOLUTIONS:")
-            print(f"   1. Log HRV in TrainingPeaks for the next {7 - len(hrv_dates)} days")
+            print(f"   1. Log HRV in TrainingPeaks for the next {7 - hrv_count} days")
             print(f"   2. OR: Backfill HRV data in TrainingPeaks for past dates")
             print(f"   3. OR: Run 'Sync Last 365 Days' if you have older HRV data")
         else:
             print(f"\n✅ You have enough HRV data! Charts should display.")
             print(f"   - 7-day rolling avg needs: 7 days ✅")
-            print(f"   - 30-day rolling avg needs: 30 days {'✅' if len(hrv_dates) >= 30 else '⚠️'}")
-            print(f"   - 90-day rolling avg needs: 90 days {'✅' if len(hrv_dates) >= 90 else '⚠️'}")
+            print(f"   - 30-day rolling avg needs: 30 days {'✅' if hrv_count >= 30 else '⚠️'}")
+            print(f"   - 90-day rolling avg needs: 90 days {'✅' if hrv_count >= 90 else '⚠️'}")
         
         print("\n" + "=" * 60)
         print("ACTION ITEMS")
         print("=" * 60)
         
-        if len(hrv_dates) >= 7:
+        if hrv_count >= 7:
             print("✅ Ready to use charts and baselines!")
             print("   - Refresh dashboard to see HRV chart")
             print("   - Click 'Calculate Baselines' button")
-        elif len(hrv_dates) >= 1:
+        elif hrv_count >= 1:
             print("⚠️  HRV ingestion is WORKING but needs more data:")
             print("   1. Log HRV daily in TrainingPeaks")
             print("   2. Run Manual Sync each day")
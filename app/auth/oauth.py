@@ -13,6 +13,13 @@ from app.utils.settings import settings
 AUTHORIZE_URL = f"{settings.tp_auth_base}/oauth/authorize"
 TOKEN_URL = f"{settings.tp_auth_base}/oauth/token"
 
+# Shared session keeps the TLS connection to the token endpoint alive, so a
+# refresh doesn't pay a fresh handshake on every expired-token API call.
+_token_session = requests.Session()
+_token_session.mount(
+    "https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=4)
+)
+
 
 def create_session(redirect_uri: str | None = None, token: dict | None = None, scope: str | list[str] | None = None) -> OAuth2Session:
     if isinstance(scope, list):
@@ -70,7 +77,7 @@ def fetch_token(code: str, scope: str | list[str] | None = None):
     
     try:
         # Use requests directly with form encoding (not authlib)
-        resp = requests.post(TOKEN_URL, data=payload, headers=headers, timeout=30)
+        resp = _token_session.post(TOKEN_URL, data=payload, headers=headers, timeout=30)
         
         # Log response for diagnostics (without exposing tokens)
         if resp.status_code != 200:
@@ -113,7 +120,7 @@ def refresh_token(refresh_token: str):
     }
     
     try:
-        resp = requests.post(TOKEN_URL, data=payload, headers=headers, timeout=30)
+        resp = _token_session.post(TOKEN_URL, data=payload, headers=headers, timeout=30)
     except Exception as e:  # noqa: BLE001
         raise RuntimeError(f"Token refresh network error: {e}. Please re-authorize.") from e
 
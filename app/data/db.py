@@ -1,3 +1,7 @@
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
 from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.exc import OperationalError
 import time
@@ -6,43 +10,200 @@ from app.utils.settings import settings
 from app.models.base import Base
 from app.models import tables  # noqa: F401 ensure models imported
 
-engine = create_engine(
-    settings.database_url,
-    echo=False,
-    future=True,
-    pool_pre_ping=True,           # Validate connections before using (avoids stale/closed connections)
-    pool_recycle=1800,            # Recycle connections every 30 minutes to avoid server timeouts
-    connect_args={"sslmode": "require"},  # Required by many hosted Postgres providers (e.g., Supabase)
-)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+@lru_cache(maxsize=1)
+def get_engine():
+    """Build the engine on first use rather than at import time.
+
+    Importing app.data.db no longer pays the SSL handshake; the connection is
+    only established when a session or DDL actually needs it.
+    """
+    return create_engine(
+        settings.database_url,
+        echo=False,
+        future=True,
+        query_cache_size=2000,       # Room for every hot statement; default 500 can thrash
+        pool_pre_ping=True,           # Validate connections before using (avoids stale/closed connections)
+        pool_recycle=1800,            # Recycle connections every 30 minutes to avoid server timeouts
+        connect_args={"sslmode": "require"},  # Required by many hosted Postgres providers (e.g., Supabase)
+    )
+
+
+@lru_cache(maxsize=1)
+def _session_factory():
+    # expire_on_commit=False keeps attributes readable after commit without a
+    # reload SELECT; sessions here are short-lived units of work, so nobody
+    # holds instances long enough for the in-memory values to go stale
+    return sessionmaker(
+        bind=get_engine(),
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+        future=True,
+    )
+
 
 def get_session():
-    return SessionLocal()
+    return _session_factory()()
+
+
+_schema_checked = False
 
 
 def ensure_schema():
     """Lightweight schema patch: add newly introduced columns if missing.
 
     This replaces a proper migration system for now (Option A). Add any future
-    ad-hoc ALTER TABLE statements here guarded by existence checks.
+    ad-hoc ALTER TABLE statements here guarded by existence checks. Runs the
+    reflection round-trips at most once per process.
     """
+    global _schema_checked
+    if _schema_checked:
+        return
+    engine = get_engine()
     insp = inspect(engine)
+    # One reflection round-trip for all tables; future existence checks can
+    # consult this dict instead of issuing their own get_columns query.
+    columns_info = {
+        table: {c['name']: c for c in cols}
+        for (_, table), cols in insp.get_multi_columns().items()
+    }
     # athletes.tp_athlete_id (Integer) added in code after initial table creation
-    athlete_cols = {c['name'] for c in insp.get_columns('athletes')}
+    athlete_cols = set(columns_info.get('athletes', {}))
     if 'tp_athlete_id' not in athlete_cols:
         with engine.begin() as conn:
             conn.execute(text("ALTER TABLE athletes ADD COLUMN tp_athlete_id INTEGER"))
+    # baseline_metrics.internal_state holds rolling-window running sums
+    baseline_cols = set(columns_info.get('baseline_metrics', {}))
+    if baseline_cols and 'internal_state' not in baseline_cols:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE baseline_metrics ADD COLUMN internal_state JSONB"))
+    # workouts.raw_hash lets re-ingest skip no-op raw_json rewrites
+    workout_cols = set(columns_info.get('workouts', {}))
+    if workout_cols and 'raw_hash' not in workout_cols:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE workouts ADD COLUMN raw_hash VARCHAR(64)"))
+    # workouts.raw_json migrated from text json to jsonb
+    raw_json_col = columns_info.get('workouts', {}).get('raw_json')
+    if raw_json_col is not None and 'jsonb' not in str(raw_json_col['type']).lower():
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE workouts ALTER COLUMN raw_json TYPE jsonb USING raw_json::jsonb"))
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("ALTER TABLE workouts ALTER COLUMN raw_json SET COMPRESSION lz4"))
+        except Exception:  # noqa: BLE001 - requires Postgres 14+; default TOAST is fine
+            pass
+    # Unique index backs the ON CONFLICT upsert in upsert_athlete (NULLs allowed)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_athletes_tp_athlete_id ON athletes (tp_athlete_id)"))
+    # Composite (athlete_id, date)-style indexes for the range scans used by
+    # the dashboard, baseline and alert queries. CONCURRENTLY can't run inside
+    # a transaction, so use an autocommit connection.
+    composite_indexes = [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_workouts_athlete_date ON workouts (athlete_id, date)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_daily_metrics_athlete_date ON daily_metrics (athlete_id, date)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_aggregates_athlete_date ON aggregates (athlete_id, date)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_risk_assessments_athlete_date ON risk_assessments (athlete_id, date)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_baseline_metrics_athlete_metric_window ON baseline_metrics (athlete_id, metric_name, window_end_date)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_baseline_lookup ON baseline_metrics (athlete_id, metric_name, window_type, created_at DESC)",
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_baseline_metrics_identity ON baseline_metrics (athlete_id, metric_name, window_type, window_end_date)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_metric_alerts_athlete_date ON metric_alerts (athlete_id, alert_date)",
+        # Partial indexes for "dates where metric is present" queries (HRV
+        # coverage, rolling baselines); much smaller than the full composite
+        # since metrics are sparsely logged.
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_daily_metrics_hrv_present ON daily_metrics (athlete_id, date DESC) WHERE hrv IS NOT NULL",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_daily_metrics_rhr_present ON daily_metrics (athlete_id, date DESC) WHERE rhr IS NOT NULL",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_daily_metrics_sleep_present ON daily_metrics (athlete_id, date DESC) WHERE sleep_hours IS NOT NULL",
+    ]
+    # Single-column athlete_id indexes are redundant once the composite
+    # indexes above exist (athlete_id is their leading column); dropping them
+    # halves index write amplification on ingest.
+    redundant_indexes = [
+        "DROP INDEX CONCURRENTLY IF EXISTS ix_workouts_athlete_id",
+        "DROP INDEX CONCURRENTLY IF EXISTS ix_daily_metrics_athlete_id",
+        "DROP INDEX CONCURRENTLY IF EXISTS ix_aggregates_athlete_id",
+        "DROP INDEX CONCURRENTLY IF EXISTS ix_risk_assessments_athlete_id",
+        "DROP INDEX CONCURRENTLY IF EXISTS ix_baseline_metrics_athlete_id",
+        "DROP INDEX CONCURRENTLY IF EXISTS ix_metric_alerts_athlete_id",
+    ]
+    # Uniqueness per athlete: one row per TrainingPeaks workout and one
+    # metrics row per day. These back the ingest dedup and ON CONFLICT
+    # upserts. Guarded separately because pre-dedup databases may still
+    # hold duplicate rows, which would make index creation fail; ingest
+    # probes for a *valid* metrics index and falls back to delete+insert
+    # otherwise (see _daily_upsert_supported in app.services.ingest). A
+    # failed CREATE INDEX CONCURRENTLY leaves an INVALID index that blocks
+    # IF NOT EXISTS from ever retrying, so invalid leftovers are dropped
+    # before each attempt — once the data is deduplicated, the next startup
+    # gets a clean retry instead of being stuck forever.
+    unique_indexes = [
+        ("ux_workouts_athlete_tpid",
+         "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_workouts_athlete_tpid ON workouts (athlete_id, tp_workout_id)"),
+        ("ux_daily_metrics_athlete_date",
+         "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_daily_metrics_athlete_date ON daily_metrics (athlete_id, date)"),
+    ]
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for ddl in composite_indexes:
+            conn.execute(text(ddl))
+        for ddl in redundant_indexes:
+            conn.execute(text(ddl))
+        for index_name, ddl in unique_indexes:
+            try:
+                invalid = conn.execute(
+                    text(
+                        "SELECT 1 FROM pg_index i"
+                        " JOIN pg_class c ON c.oid = i.indexrelid"
+                        " WHERE c.relname = :name AND NOT i.indisvalid"
+                    ),
+                    {"name": index_name},
+                ).first()
+                if invalid is not None:
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+                conn.execute(text(ddl))
+            except Exception:  # noqa: BLE001 - duplicates from pre-dedup data
+                pass
+    _schema_checked = True
+
+def _schema_sentinel() -> Path:
+    """Sentinel file recording that the current declared schema was applied.
+
+    Hash of the target database URL plus every declared column (with its
+    type), so pointing the app at a different database, adding a model,
+    adding a column to an existing model, or changing a column type all
+    invalidate the sentinel and the next startup runs
+    create_all/ensure_schema again — ensure_schema exists precisely to
+    apply those column-level patches.
+    """
+    columns = sorted(
+        f"{table.name}.{col.name}:{col.type}"
+        for table in Base.metadata.tables.values()
+        for col in table.columns
+    )
+    fingerprint = settings.database_url + "|" + "|".join(columns)
+    digest = hashlib.sha256(fingerprint.encode()).hexdigest()[:16]
+    return Path.home() / ".cache" / "podium" / f"schema_ok_{digest}"
+
 
 def init_db():
     """Create tables then apply simple schema patches if needed, with transient retry."""
+    sentinel = _schema_sentinel()
+    if sentinel.exists():
+        # Schema already verified for this table set; skip ~10 reflection
+        # round-trips on warm restart.
+        return
     backoffs = [1, 3, 5]
     last_err = None
     for delay in [0] + backoffs:
         if delay:
             time.sleep(delay)
         try:
-            Base.metadata.create_all(bind=engine)
+            Base.metadata.create_all(bind=get_engine())
             ensure_schema()
+            try:
+                sentinel.parent.mkdir(parents=True, exist_ok=True)
+                sentinel.touch()
+            except OSError:
+                pass  # read-only home dir just means we re-verify next start
             return
         except OperationalError as e:
             # Capture and retry on transient server-closed-connection errors
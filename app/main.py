@@ -12,7 +12,6 @@ if PROJECT_ROOT not in sys.path:
 load_dotenv()
 
 from app.utils.settings import settings
-from app.ui import oauth_view, dashboard_view
 from app.data.db import init_db
 from app.scheduling.scheduler import start_scheduler
 
@@ -20,11 +19,12 @@ st.set_page_config(page_title="Podium Dashboard", layout="wide")
 
 st.title("Podium Dashboard")
 
-# Initialize database tables (no Alembic path)
-init_db()
-
-# Start scheduler once
-start_scheduler()
+# Initialize database tables (no Alembic path) and start the scheduler once
+# per session instead of on every Streamlit rerun.
+if "bootstrapped" not in st.session_state:
+    init_db()
+    start_scheduler()
+    st.session_state.bootstrapped = True
 
 # Determine if OAuth callback params present to force Connect page
 query_params = st.query_params
@@ -45,7 +45,10 @@ page = st.sidebar.selectbox(
 )
 st.session_state.current_page = page
 
+# Import views lazily so each rerun only pays for the page it renders
 if st.session_state.current_page == "Connect TrainingPeaks":
+    from app.ui import oauth_view
     oauth_view.render()
 else:
+    from app.ui import dashboard_view
     dashboard_view.render()
@@ -1,12 +1,17 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Float, JSON, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Float, JSON, Boolean, Index, desc
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from .base import Base
 
+# Binary JSON on Postgres (no re-parse on read, nested keys indexable);
+# plain JSON elsewhere (e.g. sqlite in tests)
+JSONPayload = JSON().with_variant(JSONB(), 'postgresql')
+
 class Athlete(Base):
     __tablename__ = 'athletes'
     id = Column(Integer, primary_key=True)
     external_id = Column(String, unique=True, index=True)
-    tp_athlete_id = Column(Integer, index=True)
+    tp_athlete_id = Column(Integer, unique=True, index=True)
     name = Column(String)
     email = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -24,21 +29,35 @@ class OAuthToken(Base):
 
 class Workout(Base):
     __tablename__ = 'workouts'
+    __table_args__ = (
+        Index('ix_workouts_athlete_date', 'athlete_id', 'date'),
+        # One row per TrainingPeaks workout per athlete; also lets the
+        # existence checks resolve as unique-index probes
+        Index('ux_workouts_athlete_tpid', 'athlete_id', 'tp_workout_id', unique=True),
+    )
     id = Column(Integer, primary_key=True)
-    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'), index=True)
+    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'))
     tp_workout_id = Column(String, index=True)
     date = Column(Date)
     sport = Column(String)
     duration_sec = Column(Integer)
     tss = Column(Float)
     intensity_factor = Column(Float)
-    raw_json = Column(JSON)
+    raw_json = Column(JSONPayload)
+    # SHA-256 of the canonical raw payload; lets re-ingest skip rewriting
+    # raw_json when nothing changed
+    raw_hash = Column(String(64))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class DailyMetric(Base):
     __tablename__ = 'daily_metrics'
+    __table_args__ = (
+        Index('ix_daily_metrics_athlete_date', 'athlete_id', 'date'),
+        # One metrics row per athlete per day; conflict target for upserts
+        Index('ux_daily_metrics_athlete_date', 'athlete_id', 'date', unique=True),
+    )
     id = Column(Integer, primary_key=True)
-    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'), index=True)
+    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'))
     date = Column(Date, index=True)
     rhr = Column(Float)
     hrv = Column(Float)
@@ -51,8 +70,9 @@ class DailyMetric(Base):
 
 class Aggregate(Base):
     __tablename__ = 'aggregates'
+    __table_args__ = (Index('ix_aggregates_athlete_date', 'athlete_id', 'date'),)
     id = Column(Integer, primary_key=True)
-    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'), index=True)
+    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'))
     date = Column(Date, index=True)
     acute_load = Column(Float)
     chronic_load = Column(Float)
@@ -64,8 +84,9 @@ class Aggregate(Base):
 
 class RiskAssessment(Base):
     __tablename__ = 'risk_assessments'
+    __table_args__ = (Index('ix_risk_assessments_athlete_date', 'athlete_id', 'date'),)
     id = Column(Integer, primary_key=True)
-    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'), index=True)
+    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'))
     date = Column(Date, index=True)
     risk_level = Column(String)
     reasons = Column(String)
@@ -82,8 +103,15 @@ class EmailLog(Base):
 
 class BaselineMetric(Base):
     __tablename__ = 'baseline_metrics'
+    __table_args__ = (
+        Index('ix_baseline_metrics_athlete_metric_window', 'athlete_id', 'metric_name', 'window_end_date'),
+        # Covers get_baseline's WHERE ... ORDER BY created_at DESC LIMIT 1
+        Index('ix_baseline_lookup', 'athlete_id', 'metric_name', 'window_type', desc('created_at')),
+        # Identity key backing the ON CONFLICT upsert in calculate_baselines
+        Index('ux_baseline_metrics_identity', 'athlete_id', 'metric_name', 'window_type', 'window_end_date', unique=True),
+    )
     id = Column(Integer, primary_key=True)
-    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'), index=True)
+    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'))
     metric_name = Column(String(50), index=True)  # 'hrv', 'rhr', 'sleep_hours'
     window_type = Column(String(20), index=True)  # 'annual', 'monthly', 'weekly'
     window_end_date = Column(Date, index=True)
@@ -92,12 +120,14 @@ class BaselineMetric(Base):
     percentile_25 = Column(Float)
     percentile_75 = Column(Float)
     sample_count = Column(Integer)
+    internal_state = Column(JSONPayload)  # running (n, sum, sumsq) for rolling_* windows
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class MetricAlert(Base):
     __tablename__ = 'metric_alerts'
+    __table_args__ = (Index('ix_metric_alerts_athlete_date', 'athlete_id', 'alert_date'),)
     id = Column(Integer, primary_key=True)
-    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'), index=True)
+    athlete_id = Column(Integer, ForeignKey('athletes.id', ondelete='CASCADE'))
     alert_date = Column(Date, index=True)
     metric_name = Column(String(50))
     alert_type = Column(String(20))  # 'weekly', 'monthly', 'acute'
@@ -1,13 +1,20 @@
+import sys
+
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
 from datetime import datetime, date
 from app.utils.settings import settings
 import pytz
 from app.services.ingest import ingest_recent
-from app.services.athletes import list_athletes
-from app.services.recovery_alerts import evaluate_recovery_alert
+from app.services.athletes import list_athletes_lite
+from app.services.recovery_alerts import evaluate_recovery_alerts_bulk
 from app.utils.dates import get_effective_today
 
-scheduler = BackgroundScheduler(timezone=pytz.timezone('America/Denver'))
+# Dedicated worker pool so a slow TrainingPeaks ingest can't starve other jobs
+scheduler = BackgroundScheduler(
+    timezone=pytz.timezone('America/Denver'),
+    executors={'default': ThreadPoolExecutor(4)},
+)
 
 _job_started = False
 
@@ -17,7 +24,11 @@ def start_scheduler():
         scheduler.start()
     if not _job_started:
         hour, minute = map(int, settings.daily_job_time.split(':'))
-        scheduler.add_job(daily_job, 'cron', hour=hour, minute=minute, id='daily_job', replace_existing=True)
+        scheduler.add_job(
+            daily_job, 'cron', hour=hour, minute=minute, id='daily_job',
+            replace_existing=True,
+            misfire_grace_time=3600,  # still run if the process was down at fire time
+        )
         _job_started = True
 
 
@@ -32,63 +43,71 @@ def daily_job():
     Note: Uses SANDBOX_CURRENT_DAY_OFFSET to handle sandbox environment's date lag.
     When offset=10, "today" is treated as 10 days ago. Set to 0 for production.
     """
+    # Buffer log lines and emit them with one write at the end of the job
+    # instead of a syscall per print.
+    lines: list[str] = []
+    log = lines.append
+
     timestamp = datetime.now().isoformat()
-    print(f"\n{'='*60}")
-    print(f"[Daily Job Started] {timestamp}")
-    print(f"{'='*60}")
-    
+    log(f"\n{'='*60}")
+    log(f"[Daily Job Started] {timestamp}")
+    log(f"{'='*60}")
+
     # Show sandbox offset information
     offset = settings.sandbox_current_day_offset
     effective_today = get_effective_today()
     actual_today = date.today()
-    
-    print(f"\n📅 Date Configuration:")
-    print(f"  Actual today: {actual_today}")
-    print(f"  Sandbox offset: {offset} days")
-    print(f"  Effective 'today': {effective_today}")
-    print(f"  Ingesting: 21 days (ensures full coverage with offset)")
-    
-    # Step 1: Ingest recent data (21 days to ensure we have enough historical data)
-    print("\n[1/2] Ingesting recent data from TrainingPeaks...")
-    ingest_result = ingest_recent(days=21)
-    print(f"  ✓ Ingestion result: {ingest_result}")
-    
-    # Step 2: Evaluate recovery alerts for all athletes
-    print("\n[2/2] Evaluating recovery alerts for all athletes...")
-    athletes = list_athletes()
-    check_date = get_effective_today()
-    
-    if not athletes:
-        print("  ℹ No athletes found in database")
-    else:
-        print(f"  Found {len(athletes)} athlete(s)")
-        
-        alert_count = 0
-        for athlete in athletes:
-            try:
-                result = evaluate_recovery_alert(
-                    athlete_id=athlete.id,
-                    check_date=check_date,
-                    threshold=0.05,  # 5% threshold
-                )
-                
-                if result['triggered']:
+
+    log(f"\n📅 Date Configuration:")
+    log(f"  Actual today: {actual_today}")
+    log(f"  Sandbox offset: {offset} days")
+    log(f"  Effective 'today': {effective_today}")
+    log(f"  Ingesting: 21 days (ensures full coverage with offset)")
+
+    try:
+        # Step 1: Ingest recent data (21 days to ensure we have enough historical data)
+        log("\n[1/2] Ingesting recent data from TrainingPeaks...")
+        ingest_result = ingest_recent(days=21)
+        log(f"  ✓ Ingestion result: {ingest_result}")
+
+        # Step 2: Evaluate recovery alerts for all athletes
+        log("\n[2/2] Evaluating recovery alerts for all athletes...")
+        athletes = list_athletes_lite()
+        check_date = effective_today  # computed once at job start
+
+        if not athletes:
+            log("  ℹ No athletes found in database")
+        else:
+            log(f"  Found {len(athletes)} athlete(s)")
+
+            alert_count = 0
+            # Single batched evaluation instead of one session + queries per athlete
+            results = evaluate_recovery_alerts_bulk(
+                [athlete_id for athlete_id, _ in athletes],
+                check_date=check_date,
+                threshold=0.05,  # 5% threshold
+            )
+            for athlete_id, name in athletes:
+                result = results.get(athlete_id, {"triggered": False, "reason": "not_evaluated"})
+
+                if result.get('reason') == 'error':
+                    log(f"  ✗ Error evaluating {name} (ID: {athlete_id}): {result.get('error')}")
+                elif result['triggered']:
                     alert_count += 1
-                    print(f"  🚨 Alert triggered for {athlete.name} (ID: {athlete.id})")
-                    print(f"     Reason: {result['reason']}")
-                    print(f"     Email status: {result.get('email_status', 'N/A')}")
+                    log(f"  🚨 Alert triggered for {name} (ID: {athlete_id})")
+                    log(f"     Reason: {result['reason']}")
+                    log(f"     Email status: {result.get('email_status', 'N/A')}")
                 else:
-                    print(f"  ✓ {athlete.name} (ID: {athlete.id}): {result['reason']}")
-                    
-            except Exception as e:
-                print(f"  ✗ Error evaluating {athlete.name} (ID: {athlete.id}): {e}")
-        
-        print(f"\n  Summary: {alert_count} alert(s) triggered out of {len(athletes)} athlete(s)")
-    
-    print(f"\n{'='*60}")
-    print(f"[Daily Job Completed] {datetime.now().isoformat()}")
-    print(f"{'='*60}\n")
-    
+                    log(f"  ✓ {name} (ID: {athlete_id}): {result['reason']}")
+
+            log(f"\n  Summary: {alert_count} alert(s) triggered out of {len(athletes)} athlete(s)")
+
+        log(f"\n{'='*60}")
+        log(f"[Daily Job Completed] {datetime.now().isoformat()}")
+        log(f"{'='*60}\n")
+    finally:
+        sys.stdout.write("\n".join(lines) + "\n")
+
     return {
         "timestamp": timestamp,
         "ingest_result": ingest_result,
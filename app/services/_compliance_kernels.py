@@ -0,0 +1,80 @@
+"""Numerical rating kernels for batch compliance evaluation.
+
+numba is an optional dependency: when it is installed the kernels are
+JIT-compiled to native loops (cached across runs), otherwise the module
+exposes pure-NumPy fallbacks with identical signatures and results. Both
+return (delta array, int8 rating-index array) where 0/1/2 map to
+good/ok/bad; missing inputs yield NaN deltas and callers null the rating
+from the NaN mask.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+try:
+    from numba import njit
+
+    HAVE_NUMBA = True
+except ImportError:  # pragma: no cover - exercised only without numba
+    HAVE_NUMBA = False
+
+
+if HAVE_NUMBA:
+
+    @njit(cache=True, fastmath=True)
+    def rate_percent_batch(planned, actual, good, ok):
+        """Percent-delta ladder: |a-p|/p rated against scalar thresholds."""
+        n = planned.shape[0]
+        pct = np.empty(n, dtype=np.float64)
+        idx = np.empty(n, dtype=np.int8)
+        for i in range(n):
+            p = planned[i]
+            a = actual[i]
+            if np.isnan(p) or np.isnan(a) or p == 0.0:
+                pct[i] = np.nan
+                idx[i] = 2
+            else:
+                d = abs(a - p) / p
+                pct[i] = d
+                if d <= good:
+                    idx[i] = 0
+                elif d <= ok:
+                    idx[i] = 1
+                else:
+                    idx[i] = 2
+        return pct, idx
+
+    @njit(cache=True, fastmath=True)
+    def rate_abs_batch(planned, actual, good, ok):
+        """Absolute-delta ladder: |a-p| rated against per-row thresholds."""
+        n = planned.shape[0]
+        diff = np.empty(n, dtype=np.float64)
+        idx = np.empty(n, dtype=np.int8)
+        for i in range(n):
+            d = abs(actual[i] - planned[i])
+            diff[i] = d
+            if d <= good[i]:
+                idx[i] = 0
+            elif d <= ok[i]:
+                idx[i] = 1
+            else:
+                idx[i] = 2
+        return diff, idx
+
+else:
+
+    def rate_percent_batch(planned, actual, good, ok):
+        """Percent-delta ladder: |a-p|/p rated against scalar thresholds."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = np.where(planned == 0, np.nan, np.abs(actual - planned) / planned)
+        # searchsorted(side="left") reproduces the <= good / <= ok / bad ladder
+        idx = np.searchsorted(
+            np.array([good, ok]), np.nan_to_num(pct, nan=0.0), side="left"
+        ).astype(np.int8)
+        return pct, idx
+
+    def rate_abs_batch(planned, actual, good, ok):
+        """Absolute-delta ladder: |a-p| rated against per-row thresholds."""
+        diff = np.abs(actual - planned)
+        idx = np.where(diff <= good, 0, np.where(diff <= ok, 1, 2)).astype(np.int8)
+        return diff, idx
@@ -1,4 +1,7 @@
-from sqlalchemy import select
+from functools import lru_cache
+
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.data.db import get_session
 from app.models.tables import Athlete
 
@@ -8,23 +11,31 @@ HARD_CODED_ATHLETE = {
     "email": "demo@example.com",
 }
 
-def get_or_create_demo_athlete():
+
+@lru_cache(maxsize=1)
+def _demo_athlete_id() -> int:
+    """Resolve (creating if needed) the demo athlete's id once per process."""
     with get_session() as session:
-        stmt = select(Athlete).where(Athlete.external_id == HARD_CODED_ATHLETE["external_id"])
-        existing = session.execute(stmt).scalars().first()
-        if existing:
-            return existing
+        stmt = lambda_stmt(lambda: select(Athlete.id).where(Athlete.external_id == HARD_CODED_ATHLETE["external_id"]))
+        athlete_id = session.execute(stmt).scalar_one_or_none()
+        if athlete_id is not None:
+            return athlete_id
         athlete = Athlete(**HARD_CODED_ATHLETE)
         session.add(athlete)
         session.commit()
-        session.refresh(athlete)
-        return athlete
+        return athlete.id
+
+
+def get_or_create_demo_athlete():
+    with get_session() as session:
+        # Primary-key fast path; the select-by-external-id runs once per process
+        return session.get(Athlete, _demo_athlete_id())
 
 
 def get_athlete_by_id(athlete_id: int) -> Athlete | None:
     """Fetch an athlete by internal id."""
     with get_session() as session:
-        stmt = select(Athlete).where(Athlete.id == athlete_id)
+        stmt = lambda_stmt(lambda: select(Athlete).where(Athlete.id == athlete_id))
         return session.execute(stmt).scalars().first()
 
 
@@ -35,42 +46,93 @@ def list_athletes() -> list[Athlete]:
         return session.execute(stmt).scalars().all()
 
 
+def list_athletes_lite() -> list[tuple[int, str]]:
+    """Return (id, name) tuples for all athletes, skipping ORM hydration.
+
+    Useful on hot paths (e.g. the scheduler's per-athlete loop) that only
+    need identifiers, not full mapped objects.
+    """
+    with get_session() as session:
+        stmt = select(Athlete.id, Athlete.name).order_by(Athlete.name)
+        return [(row.id, row.name) for row in session.execute(stmt).all()]
+
+
+def upsert_athletes_bulk(rows: list[dict]) -> list[Athlete]:
+    """Upsert a whole TrainingPeaks roster in one statement.
+
+    Each row is a dict with tp_athlete_id and optional name/email/
+    external_id. One INSERT ... ON CONFLICT DO UPDATE and one commit cover
+    the entire batch, instead of a round-trip and fsync per athlete.
+    """
+    if not rows:
+        return []
+    values = [
+        dict(
+            external_id=row.get("external_id") or f"tp_{row['tp_athlete_id']}",
+            tp_athlete_id=row["tp_athlete_id"],
+            name=row.get("name") or f"Athlete {row['tp_athlete_id']}",
+            email=row.get("email"),
+        )
+        for row in rows
+    ]
+    with get_session() as session:
+        stmt = pg_insert(Athlete).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Athlete.tp_athlete_id],
+            set_={
+                "name": stmt.excluded.name,
+                "email": stmt.excluded.email,
+            },
+        ).returning(Athlete)
+        athletes = session.scalars(
+            stmt, execution_options={"populate_existing": True}
+        ).all()
+        session.commit()
+        return list(athletes)
+
+
 def upsert_athlete(tp_athlete_id: int, name: str | None = None, email: str | None = None, external_id: str | None = None) -> Athlete:
-    """Create or update a local Athlete row from a TrainingPeaks roster entry."""
+    """Create or update a local Athlete row from a TrainingPeaks roster entry.
+
+    Uses a single INSERT ... ON CONFLICT DO UPDATE keyed on tp_athlete_id
+    (unique index) instead of SELECT-then-UPDATE, so a roster sync is one
+    round-trip per athlete.
+    """
     with get_session() as session:
-        # Prefer matching by tp_athlete_id if present
-        stmt = select(Athlete).where(Athlete.tp_athlete_id == tp_athlete_id)
-        existing = session.execute(stmt).scalars().first()
-        if existing:
-            # Update fields if provided
-            if name and existing.name != name:
-                existing.name = name
-            if email and existing.email != email:
-                existing.email = email
-            session.commit()
-            session.refresh(existing)
-            return existing
-        # Else try external_id if provided
+        # Claim a pre-existing row (created before its TrainingPeaks id was
+        # known) when the caller matches it by external_id.
         if external_id:
             stmt2 = select(Athlete).where(Athlete.external_id == external_id)
             existing2 = session.execute(stmt2).scalars().first()
-            if existing2:
+            if existing2 and existing2.tp_athlete_id is None:
                 existing2.tp_athlete_id = tp_athlete_id
                 if name and existing2.name != name:
                     existing2.name = name
                 if email and existing2.email != email:
                     existing2.email = email
                 session.commit()
-                session.refresh(existing2)
                 return existing2
-        # Create new
-        athlete = Athlete(
+
+        stmt = pg_insert(Athlete).values(
             external_id=external_id or f"tp_{tp_athlete_id}",
             tp_athlete_id=tp_athlete_id,
             name=name or f"Athlete {tp_athlete_id}",
             email=email,
         )
-        session.add(athlete)
+        # Only overwrite fields the caller actually provided
+        update_fields = {}
+        if name:
+            update_fields["name"] = stmt.excluded.name
+        if email:
+            update_fields["email"] = stmt.excluded.email
+        if not update_fields:
+            update_fields["tp_athlete_id"] = stmt.excluded.tp_athlete_id  # no-op so RETURNING still fires
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Athlete.tp_athlete_id],
+            set_=update_fields,
+        ).returning(Athlete)
+        athlete = session.scalars(
+            stmt, execution_options={"populate_existing": True}
+        ).first()
         session.commit()
-        session.refresh(athlete)
         return athlete
@@ -1,9 +1,17 @@
 """Baseline calculation and deviation detection for athlete metrics."""
+import math
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, timedelta
-from sqlalchemy import select, delete
+from functools import lru_cache
+from operator import attrgetter
+import numpy as np
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased
 from app.data.db import get_session
 from app.models.tables import DailyMetric, BaselineMetric, MetricAlert
-import statistics
 from app.utils.dates import get_effective_today
 
 
@@ -28,11 +36,109 @@ METRIC_CONFIGS = {
     },
 }
 
+# Precomputed deviation sign per metric turns the "lower is better" flip
+# into a branchless multiply on the scoring hot path
+for _cfg in METRIC_CONFIGS.values():
+    _cfg["sign"] = 1.0 if _cfg["higher_is_better"] else -1.0
+
 # Alert thresholds (standard deviations)
 THRESHOLD_WEEKLY = 1.0
 THRESHOLD_MONTHLY = 0.75
 THRESHOLD_ACUTE = 2.0
 
+# Flattened check tasks for the alert hot path: attrgetter resolves the
+# metric column at C level and skips the per-call dict lookups
+_METRIC_TASKS = tuple(
+    (name, attrgetter(cfg["db_field"]), cfg["sign"], cfg["display_name"], cfg["unit"])
+    for name, cfg in METRIC_CONFIGS.items()
+)
+
+
+def _window_stats_sql(session, athlete_id: int, end_date: date, windows: dict[str, int]):
+    """Compute every window/metric aggregate in a single SELECT.
+
+    Uses FILTER clauses over the annual range so Postgres does one scan and
+    never ships individual rows. Returns {(window, metric): (mean, std_dev,
+    p25, p75, sample_count)}.
+    """
+    exprs, keys = [], []
+    for window_name, days_back in windows.items():
+        in_window = DailyMetric.date >= end_date - timedelta(days=days_back)
+        for metric_name, config in METRIC_CONFIGS.items():
+            col = getattr(DailyMetric, config["db_field"])
+            exprs.extend([
+                func.avg(col).filter(in_window),
+                func.stddev_samp(col).filter(in_window),
+                func.percentile_cont(0.25).within_group(col.asc()).filter(in_window),
+                func.percentile_cont(0.75).within_group(col.asc()).filter(in_window),
+                func.count(col).filter(in_window),
+            ])
+            keys.append((window_name, metric_name))
+    row = session.execute(
+        select(*exprs).where(
+            DailyMetric.athlete_id == athlete_id,
+            DailyMetric.date >= end_date - timedelta(days=max(windows.values())),
+            DailyMetric.date <= end_date,
+        )
+    ).one()
+    return {
+        key: tuple(row[i:i + 5])
+        for key, i in zip(keys, range(0, len(exprs), 5))
+    }
+
+
+def _window_stats_numpy(session, athlete_id: int, end_date: date, windows: dict[str, int]):
+    """NumPy fallback for dialects without stddev/percentile aggregates.
+
+    Fetches the annual window once (columns only, ordered by date) and
+    slices it for the shorter windows instead of refetching overlapping
+    rows. Same return shape as _window_stats_sql.
+    """
+    stmt = select(
+        DailyMetric.date, DailyMetric.hrv, DailyMetric.rhr, DailyMetric.sleep_hours
+    ).where(
+        DailyMetric.athlete_id == athlete_id,
+        DailyMetric.date >= end_date - timedelta(days=max(windows.values())),
+        DailyMetric.date <= end_date
+    ).order_by(DailyMetric.date)
+
+    # Stream row tuples in server-side batches rather than buffering the
+    # whole year, appending straight into per-column lists
+    dates, raw = [], {"hrv": [], "rhr": [], "sleep_hours": []}
+    for d, hrv, rhr, sleep in session.execute(stmt).yield_per(200):
+        dates.append(d)
+        raw["hrv"].append(hrv)
+        raw["rhr"].append(rhr)
+        raw["sleep_hours"].append(sleep)
+
+    if not dates:
+        return {}
+
+    # NaN-padded float arrays so window stats run as C-level aggregates
+    columns = {
+        name: np.array([v if v is not None else np.nan for v in vals], dtype=np.float64)
+        for name, vals in raw.items()
+    }
+
+    stats = {}
+    for window_name, days_back in windows.items():
+        start_date = end_date - timedelta(days=days_back)
+        lo = bisect_left(dates, start_date)  # rows are date-ordered
+        for metric_name, config in METRIC_CONFIGS.items():
+            window_vals = columns[config["db_field"]][lo:]
+            values = window_vals[~np.isnan(window_vals)]
+            if not values.size:
+                stats[(window_name, metric_name)] = (None, None, None, None, 0)
+                continue
+            std_dev = float(values.std(ddof=1)) if values.size > 1 else None
+            # Introselect the two order statistics in O(n) instead of a
+            # full sort or interpolating percentile
+            k25, k75 = values.size // 4, (3 * values.size) // 4
+            part = np.partition(values, (k25, k75))
+            p25, p75 = float(part[k25]), float(part[k75])
+            stats[(window_name, metric_name)] = (float(values.mean()), std_dev, p25, p75, int(values.size))
+    return stats
+
 
 def calculate_baselines(athlete_id: int, end_date: date | None = None):
     """Calculate annual, monthly, and weekly baselines for all metrics.
@@ -46,7 +152,7 @@ def calculate_baselines(athlete_id: int, end_date: date | None = None):
     """
     if end_date is None:
         end_date = get_effective_today()
-    
+
     windows = {
         "annual": 365,
         "semiannual": 180,
@@ -54,71 +160,259 @@ def calculate_baselines(athlete_id: int, end_date: date | None = None):
         "monthly": 30,
         "weekly": 7,
     }
-    
+
     results = {}
-    
-    for window_name, days_back in windows.items():
-        start_date = end_date - timedelta(days=days_back)
-        
-        with get_session() as session:
-            # Fetch metrics in date range
-            stmt = select(DailyMetric).where(
-                DailyMetric.athlete_id == athlete_id,
-                DailyMetric.date >= start_date,
-                DailyMetric.date <= end_date
-            )
-            metrics = session.execute(stmt).scalars().all()
-            
-            if not metrics:
+
+    with get_session() as session:
+        # Postgres computes all window aggregates server-side; elsewhere
+        # (e.g. sqlite, which lacks stddev/percentile_cont) fall back to
+        # fetching the annual window once and slicing with NumPy.
+        if session.get_bind().dialect.name == "postgresql":
+            stats = _window_stats_sql(session, athlete_id, end_date, windows)
+        else:
+            stats = _window_stats_numpy(session, athlete_id, end_date, windows)
+
+        new_baselines = []
+        for (window_name, metric_name), (mean, std_dev, p25, p75, n) in stats.items():
+            if n < 3 or mean is None:  # Need at least 3 data points
                 continue
-            
-            # Calculate baseline for each metric type
-            for metric_name, config in METRIC_CONFIGS.items():
-                field_name = config["db_field"]
-                values = [getattr(m, field_name) for m in metrics if getattr(m, field_name) is not None]
-                
-                if len(values) < 3:  # Need at least 3 data points
-                    continue
-                
-                mean = statistics.mean(values)
-                std_dev = statistics.stdev(values) if len(values) > 1 else 0
-                sorted_values = sorted(values)
-                p25 = sorted_values[len(sorted_values) // 4]
-                p75 = sorted_values[(3 * len(sorted_values)) // 4]
-                
-                # Delete old baseline for this window
-                session.execute(delete(BaselineMetric).where(
+
+            new_baselines.append(dict(
+                athlete_id=athlete_id,
+                metric_name=metric_name,
+                window_type=window_name,
+                window_end_date=end_date,
+                mean=float(mean),
+                std_dev=float(std_dev) if std_dev is not None else 0.0,
+                percentile_25=float(p25),
+                percentile_75=float(p75),
+                sample_count=int(n),
+            ))
+
+            results.setdefault(metric_name, {})[window_name] = {
+                "mean": float(mean),
+                "std_dev": float(std_dev) if std_dev is not None else 0.0,
+                "sample_count": int(n),
+            }
+
+        # Single upsert keyed on (athlete, metric, window, end date) and one
+        # commit, instead of a DELETE + INSERT + fsync per window/metric
+        if new_baselines:
+            stmt = pg_insert(BaselineMetric).values(new_baselines)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    BaselineMetric.athlete_id,
+                    BaselineMetric.metric_name,
+                    BaselineMetric.window_type,
+                    BaselineMetric.window_end_date,
+                ],
+                set_={
+                    "mean": stmt.excluded.mean,
+                    "std_dev": stmt.excluded.std_dev,
+                    "percentile_25": stmt.excluded.percentile_25,
+                    "percentile_75": stmt.excluded.percentile_75,
+                    "sample_count": stmt.excluded.sample_count,
+                },
+            )
+            session.execute(stmt)
+            session.commit()
+            _bump_baseline_cache()
+
+    return results
+
+
+def calculate_baselines_bulk(athlete_ids: list[int], end_date: date | None = None, max_workers: int = 8):
+    """Recalculate baselines for many athletes concurrently.
+
+    Each athlete is independent and mostly waits on DB I/O, so a thread pool
+    overlaps the SQL latency; every worker gets its own session via
+    get_session(). Returns {athlete_id: calculate_baselines result}.
+
+    Args:
+        athlete_ids: IDs of athletes to process
+        end_date: shared end date for all athletes (defaults to today)
+        max_workers: thread pool size
+    """
+    if end_date is None:
+        end_date = get_effective_today()
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(calculate_baselines, athlete_id, end_date): athlete_id
+            for athlete_id in athlete_ids
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+# Short rolling windows maintained incrementally on each ingest (see
+# update_rolling_baselines); distinct from the statistical windows above.
+ROLLING_WINDOWS = {
+    "rolling_7": 7,
+    "rolling_30": 30,
+    "rolling_90": 90,
+}
+
+# Force the full-rebuild branch every N days so running sums re-sync with
+# any in-window DailyMetric revisions (ingest re-upserts recent days
+# routinely; the incremental path deliberately keeps the originally folded
+# values until then)
+_ROLLING_RESYNC_DAYS = 7
+
+
+def update_rolling_baselines(athlete_id: int, end_date: date | None = None):
+    """Maintain 7/30/90-day rolling baselines with O(1) incremental updates.
+
+    Each rolling row keeps running (n, sum, sumsq) plus the per-day values
+    behind them in internal_state, so when the window advances one day we
+    add the newly ingested sample and evict the value that was originally
+    folded in for the day leaving the window — not the day's current DB row,
+    which ingest may have revised since. A full window scan happens on first
+    run, after a gap, and every _ROLLING_RESYNC_DAYS days so revised
+    in-window samples converge. Dashboard readers get the rolling mean/std
+    from one row instead of re-scanning up to 90 DailyMetric rows.
+
+    Returns:
+        dict of metric -> window -> {mean, std_dev, sample_count}
+    """
+    if end_date is None:
+        end_date = get_effective_today()
+
+    results = {}
+    with get_session() as session:
+        existing = {
+            (row.metric_name, row.window_type): row
+            for row in session.execute(
+                select(BaselineMetric).where(
                     BaselineMetric.athlete_id == athlete_id,
-                    BaselineMetric.metric_name == metric_name,
-                    BaselineMetric.window_type == window_name
-                ))
-                
-                # Store new baseline
-                baseline = BaselineMetric(
-                    athlete_id=athlete_id,
-                    metric_name=metric_name,
-                    window_type=window_name,
-                    window_end_date=end_date,
-                    mean=mean,
-                    std_dev=std_dev,
-                    percentile_25=p25,
-                    percentile_75=p75,
-                    sample_count=len(values),
+                    BaselineMetric.window_type.in_(ROLLING_WINDOWS),
                 )
-                session.add(baseline)
-                session.commit()
-                
-                results.setdefault(metric_name, {})[window_name] = {
+            ).scalars()
+        }
+
+        # Only today's sample is read from the DB; evictions use the per-day
+        # values kept in internal_state
+        today_row = session.execute(
+            select(DailyMetric).where(
+                DailyMetric.athlete_id == athlete_id,
+                DailyMetric.date == end_date,
+            )
+        ).scalars().first()
+        window_rows = None  # 90-day scan, fetched lazily for rebuilds only
+        resync_due = end_date.toordinal() % _ROLLING_RESYNC_DAYS == 0
+
+        for window_type, days_back in ROLLING_WINDOWS.items():
+            window_start = end_date - timedelta(days=days_back - 1)
+            for metric_name, config in METRIC_CONFIGS.items():
+                field = config["db_field"]
+                row = existing.get((metric_name, window_type))
+                state = dict(row.internal_state) if row is not None and row.internal_state else None
+
+                if row is not None and state and row.window_end_date == end_date:
+                    continue  # already current for this date
+
+                if (
+                    row is not None
+                    and state
+                    and state.get("values") is not None
+                    and row.window_end_date == end_date - timedelta(days=1)
+                    and not resync_due
+                ):
+                    # Incremental path: push today's sample, evict the value
+                    # originally folded in for the day leaving the window (the
+                    # DB row for that day may have been revised since)
+                    values = state["values"]
+                    new_val = getattr(today_row, field) if today_row is not None else None
+                    if new_val is not None:
+                        state["n"] += 1
+                        state["sum"] += new_val
+                        state["sumsq"] += new_val * new_val
+                        values[end_date.isoformat()] = new_val
+                    evict_val = values.pop(
+                        (window_start - timedelta(days=1)).isoformat(), None
+                    )
+                    if evict_val is not None and state["n"] > 0:
+                        state["n"] -= 1
+                        state["sum"] -= evict_val
+                        state["sumsq"] -= evict_val * evict_val
+                else:
+                    # First run or gap: rebuild state from the window scan
+                    if window_rows is None:
+                        window_rows = session.execute(
+                            select(
+                                DailyMetric.date,
+                                DailyMetric.hrv,
+                                DailyMetric.rhr,
+                                DailyMetric.sleep_hours,
+                            ).where(
+                                DailyMetric.athlete_id == athlete_id,
+                                DailyMetric.date >= end_date - timedelta(days=max(ROLLING_WINDOWS.values()) - 1),
+                                DailyMetric.date <= end_date,
+                            )
+                        ).all()
+                    col = {"hrv": 1, "rhr": 2, "sleep_hours": 3}[metric_name]
+                    # Single fused pass for n/sum/sumsq instead of one
+                    # traversal per accumulator; per-day values are kept so
+                    # later evictions subtract what was actually folded in
+                    n_vals, total, total_sq = 0, 0.0, 0.0
+                    day_values = {}
+                    for r in window_rows:
+                        v = r[col]
+                        if v is not None and r[0] >= window_start:
+                            n_vals += 1
+                            total += v
+                            total_sq += v * v
+                            day_values[r[0].isoformat()] = v
+                    state = {"n": n_vals, "sum": total, "sumsq": total_sq, "values": day_values}
+
+                n = state["n"]
+                mean = state["sum"] / n if n else None
+                if n > 1:
+                    variance = (state["sumsq"] - n * mean * mean) / (n - 1)
+                    std_dev = math.sqrt(max(variance, 0.0))
+                else:
+                    std_dev = 0.0 if n else None
+
+                if row is None:
+                    row = BaselineMetric(
+                        athlete_id=athlete_id,
+                        metric_name=metric_name,
+                        window_type=window_type,
+                    )
+                    session.add(row)
+                    existing[(metric_name, window_type)] = row
+                row.window_end_date = end_date
+                row.mean = mean
+                row.std_dev = std_dev
+                row.sample_count = n
+                row.internal_state = state
+
+                results.setdefault(metric_name, {})[window_type] = {
                     "mean": mean,
                     "std_dev": std_dev,
-                    "sample_count": len(values),
+                    "sample_count": n,
                 }
-    
+        session.commit()
+    _bump_baseline_cache()
+
     return results
 
 
-def get_baseline(athlete_id: int, metric_name: str, window_type: str) -> BaselineMetric | None:
-    """Retrieve baseline for specific metric and window."""
+# Read cache for get_baseline: entries live for the TTL or until a baseline
+# write bumps the epoch, whichever comes first
+_BASELINE_CACHE_TTL = 300  # seconds
+_cache_epoch = 0
+
+
+def _bump_baseline_cache():
+    global _cache_epoch
+    _cache_epoch += 1
+
+
+@lru_cache(maxsize=1024)
+def _get_baseline_cached(athlete_id: int, metric_name: str, window_type: str, _key: tuple) -> BaselineMetric | None:
     with get_session() as session:
         stmt = select(BaselineMetric).where(
             BaselineMetric.athlete_id == athlete_id,
@@ -128,9 +422,63 @@ def get_baseline(athlete_id: int, metric_name: str, window_type: str) -> Baselin
         return session.execute(stmt).scalars().first()
 
 
-def calculate_deviation_score(value: float, baseline: BaselineMetric, higher_is_better: bool) -> float:
+def get_baseline(athlete_id: int, metric_name: str, window_type: str) -> BaselineMetric | None:
+    """Retrieve baseline for specific metric and window.
+
+    Pure read, called repeatedly across the alert pipeline and dashboard
+    within a short span, so results are memoized per process.
+    """
+    key = (_cache_epoch, int(time.time() // _BASELINE_CACHE_TTL))
+    return _get_baseline_cached(athlete_id, metric_name, window_type, key)
+
+
+def get_best_baselines(
+    athlete_id: int,
+    metric_names,
+    window_priority,
+) -> dict[str, BaselineMetric]:
+    """Fetch the highest-priority usable baseline per metric in one query.
+
+    window_priority is an ordered sequence (best first). The priority walk
+    happens in SQL — ROW_NUMBER partitioned by metric, ordered by a CASE over
+    the window ranking then recency — so one row per metric crosses the wire
+    and the caller never loops windows. Rows with a NULL mean are skipped,
+    mirroring the old fall-through to the next window. Metrics with no usable
+    baseline are simply absent from the result.
+    """
+    with get_session() as session:
+        priority = case(
+            {window: rank for rank, window in enumerate(window_priority)},
+            value=BaselineMetric.window_type,
+        )
+        ranked = (
+            select(
+                BaselineMetric,
+                func.row_number().over(
+                    partition_by=BaselineMetric.metric_name,
+                    order_by=(priority, BaselineMetric.created_at.desc()),
+                ).label("rank"),
+            )
+            .where(
+                BaselineMetric.athlete_id == athlete_id,
+                BaselineMetric.metric_name.in_(tuple(metric_names)),
+                BaselineMetric.window_type.in_(tuple(window_priority)),
+                BaselineMetric.mean.is_not(None),
+            )
+            .subquery()
+        )
+        best = aliased(BaselineMetric, ranked)
+        stmt = select(best).where(ranked.c.rank == 1)
+        return {row.metric_name: row for row in session.execute(stmt).scalars()}
+
+
+def calculate_deviation_score(value: float, baseline: BaselineMetric, sign: float = 1.0) -> float:
     """Calculate z-score deviation from baseline.
-    
+
+    sign is +1.0 for higher-is-better metrics and -1.0 for lower-is-better
+    ones (precomputed in METRIC_CONFIGS), so the flip is a multiply rather
+    than a branch.
+
     Returns:
         Positive score = better than baseline
         Negative score = worse than baseline
@@ -138,14 +486,8 @@ def calculate_deviation_score(value: float, baseline: BaselineMetric, higher_is_
     """
     if baseline.std_dev == 0:
         return 0.0
-    
-    z_score = (value - baseline.mean) / baseline.std_dev
-    
-    # Flip sign if lower is better (e.g., RHR)
-    if not higher_is_better:
-        z_score = -z_score
-    
-    return z_score
+
+    return sign * (value - baseline.mean) / baseline.std_dev
 
 
 def get_severity(deviation_score: float) -> str:
@@ -185,35 +527,45 @@ def check_alert_conditions(athlete_id: int, check_date: date | None = None) -> l
         
         if not today_metric:
             return alerts
-        
+
+        # One query for all needed baselines instead of six get_baseline
+        # round-trips; newest row wins per (metric, window)
+        baseline_stmt = select(BaselineMetric).where(
+            BaselineMetric.athlete_id == athlete_id,
+            BaselineMetric.window_type.in_(("weekly", "monthly"))
+        ).order_by(BaselineMetric.created_at.desc())
+        baselines = {}
+        for row in session.execute(baseline_stmt).scalars():
+            baselines.setdefault((row.metric_name, row.window_type), row)
+
         # Check each metric
-        for metric_name, config in METRIC_CONFIGS.items():
-            current_value = getattr(today_metric, config["db_field"])
+        for metric_name, value_of, sign, display_name, unit in _METRIC_TASKS:
+            current_value = value_of(today_metric)
             if current_value is None:
                 continue
-            
+
             # Check weekly average vs monthly baseline
-            weekly_baseline = get_baseline(athlete_id, metric_name, "weekly")
-            monthly_baseline = get_baseline(athlete_id, metric_name, "monthly")
-            
+            weekly_baseline = baselines.get((metric_name, "weekly"))
+            monthly_baseline = baselines.get((metric_name, "monthly"))
+
             if weekly_baseline and monthly_baseline:
                 # Weekly average deviation from monthly
                 if weekly_baseline.std_dev > 0:
                     weekly_deviation = calculate_deviation_score(
                         weekly_baseline.mean,
                         monthly_baseline,
-                        config["higher_is_better"]
+                        sign
                     )
                     
                     if abs(weekly_deviation) > THRESHOLD_WEEKLY:
                         severity = get_severity(weekly_deviation)
                         message = generate_alert_message(
-                            config["display_name"],
+                            display_name,
                             weekly_baseline.mean,
                             monthly_baseline.mean,
                             weekly_deviation,
                             "weekly",
-                            config["unit"]
+                            unit
                         )
                         
                         alert = MetricAlert(
@@ -235,18 +587,18 @@ def check_alert_conditions(athlete_id: int, check_date: date | None = None) -> l
                 acute_deviation = calculate_deviation_score(
                     current_value,
                     weekly_baseline,
-                    config["higher_is_better"]
+                    sign
                 )
                 
                 if abs(acute_deviation) > THRESHOLD_ACUTE:
                     severity = get_severity(acute_deviation)
                     message = generate_alert_message(
-                        config["display_name"],
+                        display_name,
                         current_value,
                         weekly_baseline.mean,
                         acute_deviation,
                         "acute",
-                        config["unit"]
+                        unit
                     )
                     
                     alert = MetricAlert(
@@ -268,32 +620,220 @@ def check_alert_conditions(athlete_id: int, check_date: date | None = None) -> l
     return alerts
 
 
+def _score_kernel(values: np.ndarray, means: np.ndarray, stds: np.ndarray, signs: np.ndarray) -> np.ndarray:
+    """Signed z-scores for aligned arrays in one SIMD pass.
+
+    Entries with zero (or missing, encoded as 0.0) std come back as 0.0,
+    matching calculate_deviation_score's scalar behavior.
+    """
+    out = np.zeros(values.shape[0], dtype=np.float64)
+    np.divide(signs * (values - means), stds, out=out, where=stds > 0)
+    return out
+
+
+def check_alert_conditions_bulk(athlete_ids: list[int], check_date: date | None = None) -> list[MetricAlert]:
+    """Set-based alert check across many athletes in one SQL pass.
+
+    Joins each athlete's daily metrics for check_date against the newest
+    weekly/monthly baselines (DISTINCT ON) and pre-filters candidates by
+    z-score server-side, so Python only scores, formats and inserts the few
+    surviving rows. Postgres-only; other dialects fall back to the
+    per-athlete check.
+
+    Args:
+        athlete_ids: IDs of athletes to check
+        check_date: Date to check (defaults to today)
+
+    Returns:
+        List of MetricAlert objects created
+    """
+    if check_date is None:
+        check_date = date.today()
+
+    with get_session() as session:
+        if session.get_bind().dialect.name != "postgresql":
+            alerts = []
+            for athlete_id in athlete_ids:
+                alerts.extend(check_alert_conditions(athlete_id, check_date))
+            return alerts
+
+        latest = (
+            select(
+                BaselineMetric.athlete_id,
+                BaselineMetric.metric_name,
+                BaselineMetric.window_type,
+                BaselineMetric.mean,
+                BaselineMetric.std_dev,
+            )
+            .where(
+                BaselineMetric.athlete_id.in_(athlete_ids),
+                BaselineMetric.window_type.in_(("weekly", "monthly")),
+            )
+            .distinct(BaselineMetric.athlete_id, BaselineMetric.metric_name, BaselineMetric.window_type)
+            .order_by(
+                BaselineMetric.athlete_id,
+                BaselineMetric.metric_name,
+                BaselineMetric.window_type,
+                BaselineMetric.created_at.desc(),
+            )
+            .cte("latest_baseline")
+        )
+        weekly = latest.alias("weekly")
+        monthly = latest.alias("monthly")
+
+        current_value = case(
+            (weekly.c.metric_name == "hrv", DailyMetric.hrv),
+            (weekly.c.metric_name == "rhr", DailyMetric.rhr),
+            else_=DailyMetric.sleep_hours,
+        )
+        # Unsigned z-scores for candidate filtering; the sign flip for
+        # lower-is-better metrics happens in Python on the survivors.
+        # nullif guards the division: Postgres may evaluate these before the
+        # sibling std_dev > 0 predicates, and a zero-std_dev baseline row
+        # would abort the whole pass with division_by_zero. A NULL z-score
+        # simply fails the threshold comparison.
+        weekly_z = func.abs(
+            (weekly.c.mean - monthly.c.mean) / func.nullif(monthly.c.std_dev, 0)
+        )
+        acute_z = func.abs(
+            (current_value - weekly.c.mean) / func.nullif(weekly.c.std_dev, 0)
+        )
+
+        stmt = (
+            select(
+                DailyMetric.athlete_id,
+                weekly.c.metric_name,
+                current_value.label("current_value"),
+                weekly.c.mean.label("weekly_mean"),
+                weekly.c.std_dev.label("weekly_std"),
+                monthly.c.mean.label("monthly_mean"),
+                monthly.c.std_dev.label("monthly_std"),
+            )
+            .select_from(DailyMetric)
+            .join(weekly, and_(
+                weekly.c.athlete_id == DailyMetric.athlete_id,
+                weekly.c.window_type == "weekly",
+            ))
+            .outerjoin(monthly, and_(
+                monthly.c.athlete_id == DailyMetric.athlete_id,
+                monthly.c.metric_name == weekly.c.metric_name,
+                monthly.c.window_type == "monthly",
+            ))
+            .where(
+                DailyMetric.athlete_id.in_(athlete_ids),
+                DailyMetric.date == check_date,
+                current_value.isnot(None),
+                or_(
+                    and_(weekly.c.std_dev > 0, monthly.c.std_dev > 0, weekly_z > THRESHOLD_WEEKLY),
+                    and_(weekly.c.std_dev > 0, acute_z > THRESHOLD_ACUTE),
+                ),
+            )
+        )
+
+        rows = session.execute(stmt).all()
+        if not rows:
+            return []
+
+        # Score all candidates in two vectorized passes instead of scalar
+        # arithmetic per row
+        signs = np.array([METRIC_CONFIGS[r.metric_name]["sign"] for r in rows])
+        current = np.array([r.current_value for r in rows], dtype=np.float64)
+        weekly_mean = np.array([r.weekly_mean for r in rows], dtype=np.float64)
+        weekly_std = np.array([r.weekly_std or 0.0 for r in rows], dtype=np.float64)
+        monthly_mean = np.array([r.monthly_mean if r.monthly_mean is not None else np.nan for r in rows], dtype=np.float64)
+        monthly_std = np.array([r.monthly_std or 0.0 for r in rows], dtype=np.float64)
+        weekly_devs = _score_kernel(weekly_mean, monthly_mean, monthly_std, signs)
+        acute_devs = _score_kernel(current, weekly_mean, weekly_std, signs)
+
+        alerts = []
+        for i, row in enumerate(rows):
+            config = METRIC_CONFIGS[row.metric_name]
+
+            if weekly_std[i] > 0 and monthly_std[i] > 0:
+                weekly_deviation = float(weekly_devs[i])
+                if abs(weekly_deviation) > THRESHOLD_WEEKLY:
+                    alerts.append(MetricAlert(
+                        athlete_id=row.athlete_id,
+                        alert_date=check_date,
+                        metric_name=row.metric_name,
+                        alert_type="weekly",
+                        current_value=row.weekly_mean,
+                        baseline_value=row.monthly_mean,
+                        deviation_score=weekly_deviation,
+                        severity=get_severity(weekly_deviation),
+                        message=generate_alert_message(
+                            config["display_name"], row.weekly_mean, row.monthly_mean,
+                            weekly_deviation, "weekly", config["unit"]
+                        ),
+                    ))
+
+            if weekly_std[i] > 0:
+                acute_deviation = float(acute_devs[i])
+                if abs(acute_deviation) > THRESHOLD_ACUTE:
+                    alerts.append(MetricAlert(
+                        athlete_id=row.athlete_id,
+                        alert_date=check_date,
+                        metric_name=row.metric_name,
+                        alert_type="acute",
+                        current_value=row.current_value,
+                        baseline_value=row.weekly_mean,
+                        deviation_score=acute_deviation,
+                        severity=get_severity(acute_deviation),
+                        message=generate_alert_message(
+                            config["display_name"], row.current_value, row.weekly_mean,
+                            acute_deviation, "acute", config["unit"]
+                        ),
+                    ))
+
+        session.add_all(alerts)
+        session.commit()
+
+    return alerts
+
+
+# Message templates keyed by alert type; avoids re-branching on every alert
+_MSG_TEMPLATES = {
+    "weekly": (
+        "{name} this week ({cur:.1f}{u}) is {pct:.0f}% {dir} "
+        "your monthly average ({base:.1f}{u})"
+    ),
+    "acute": (
+        "Today's {name} ({cur:.1f}{u}) is significantly {dir} "
+        "your weekly average ({base:.1f}{u})"
+    ),
+}
+_MSG_DEFAULT = "{name}: {cur:.1f}{u} vs baseline {base:.1f}{u}"
+
+
 def generate_alert_message(metric_name: str, current: float, baseline: float, deviation: float, alert_type: str, unit: str) -> str:
     """Generate human-readable alert message."""
     direction = "above" if deviation > 0 else "below"
-    percent_diff = abs((current - baseline) / baseline * 100) if baseline != 0 else 0
-    
-    if alert_type == "weekly":
-        return (
-            f"{metric_name} this week ({current:.1f}{unit}) is {percent_diff:.0f}% {direction} "
-            f"your monthly average ({baseline:.1f}{unit})"
-        )
-    elif alert_type == "acute":
-        return (
-            f"Today's {metric_name} ({current:.1f}{unit}) is significantly {direction} "
-            f"your weekly average ({baseline:.1f}{unit})"
-        )
-    else:
-        return f"{metric_name}: {current:.1f}{unit} vs baseline {baseline:.1f}{unit}"
+    # Only the weekly template interpolates a percent difference
+    percent_diff = abs((current - baseline) / baseline * 100) if alert_type == "weekly" and baseline != 0 else 0
+    return _MSG_TEMPLATES.get(alert_type, _MSG_DEFAULT).format(
+        name=metric_name, cur=current, base=baseline, pct=percent_diff, dir=direction, u=unit
+    )
+
 
+def get_recent_alerts(athlete_id: int, days: int = 7, limit: int = 100):
+    """Get recent alerts for an athlete, newest first.
 
-def get_recent_alerts(athlete_id: int, days: int = 7) -> list[MetricAlert]:
-    """Get recent alerts for an athlete."""
+    Returns row tuples with the fields callers actually render
+    (alert_date, metric_name, alert_type, severity, message), capped at
+    limit; the (athlete_id, alert_date) composite index makes the ordered
+    scan a backward index walk rather than a sort.
+    """
     cutoff_date = date.today() - timedelta(days=days)
-    
+
     with get_session() as session:
-        stmt = select(MetricAlert).where(
+        stmt = select(
+            MetricAlert.alert_date,
+            MetricAlert.metric_name,
+            MetricAlert.alert_type,
+            MetricAlert.severity,
+            MetricAlert.message,
+        ).where(
             MetricAlert.athlete_id == athlete_id,
             MetricAlert.alert_date >= cutoff_date
-        ).order_by(MetricAlert.alert_date.desc())
-        return session.execute(stmt).scalars().all()
+        ).order_by(MetricAlert.alert_date.desc()).limit(limit)
+        return session.execute(stmt).all()
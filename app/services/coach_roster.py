@@ -1,5 +1,5 @@
 from app.services.tp_api import get_api
-from app.services.athletes import upsert_athlete
+from app.services.athletes import upsert_athletes_bulk
 
 
 def sync_coach_roster(athlete_id: int | None = None) -> dict:
@@ -13,9 +13,7 @@ def sync_coach_roster(athlete_id: int | None = None) -> dict:
     """
     api = get_api(athlete_id)
     roster = api.fetch_coach_athletes()
-    inserted = 0
-    updated = 0
-    results = []
+    rows = []
     for item in roster:
         tp_id = item.get('Id') or item.get('id')
         if not tp_id:
@@ -24,13 +22,19 @@ def sync_coach_roster(athlete_id: int | None = None) -> dict:
         last = item.get('LastName') or ''
         email = item.get('Email')
         name = (first + ' ' + last).strip() or None
-        athlete = upsert_athlete(tp_athlete_id=tp_id, name=name, email=email)
-        results.append({
+        rows.append({'tp_athlete_id': tp_id, 'name': name, 'email': email})
+    # One transactional batch for the whole roster instead of an upsert
+    # round-trip per athlete
+    athletes = upsert_athletes_bulk(rows)
+    results = [
+        {
             'id': athlete.id,
             'tp_athlete_id': athlete.tp_athlete_id,
             'name': athlete.name,
             'email': athlete.email,
-        })
+        }
+        for athlete in athletes
+    ]
     return {
         'count': len(results),
         'athletes': results[:10],  # include a small sample
@@ -1,5 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from typing import List, Dict, Any
+
+import numpy as np
 from app.services.tp_api import get_api
 from app.services.athletes import get_or_create_demo_athlete
 
@@ -26,34 +29,37 @@ def find_missing_dates(days_back: int = 30) -> Dict[str, Any]:
     start = end - timedelta(days=days_back - 1)
 
     with get_session() as session:
-        stmt = select(DailyMetric).where(
+        # Only the date column — no point hydrating full DailyMetric rows
+        # (and their identity-map bookkeeping) to read one field
+        stmt = select(DailyMetric.date).where(
             DailyMetric.date >= start,
             DailyMetric.date <= end
         ).order_by(DailyMetric.date)
-        rows = session.execute(stmt).scalars().all()
+        ordinals = [d.toordinal() for (d,) in session.execute(stmt)]
 
-    present_dates = {r.date for r in rows}
-    expected_dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
-    missing = [d for d in expected_dates if d not in present_dates]
+    # Date arithmetic as int ordinals: set difference and run detection are
+    # single NumPy passes instead of Python loops over the whole window
+    present = np.unique(np.array(ordinals, dtype=np.int32))
+    expected = np.arange(start.toordinal(), end.toordinal() + 1, dtype=np.int32)
+    missing_ordinals = np.setdiff1d(expected, present, assume_unique=True)
+    missing = [date.fromordinal(int(o)) for o in missing_ordinals]
 
     api_raw_missing = []
     if missing:
-        # Group consecutive missing dates into ranges
-        ranges = []
-        cur_start = missing[0]
-        prev = missing[0]
-        for d in missing[1:]:
-            if d == prev + timedelta(days=1):
-                prev = d
-            else:
-                ranges.append((cur_start, prev))
-                cur_start = d
-                prev = d
-        ranges.append((cur_start, prev))
+        # Group consecutive missing dates into ranges: split wherever the
+        # ordinal gap between neighbours exceeds one day
+        splits = np.where(np.diff(missing_ordinals) != 1)[0] + 1
+        ranges = [
+            (date.fromordinal(int(run[0])), date.fromordinal(int(run[-1])))
+            for run in np.split(missing_ordinals, splits)
+        ]
 
-        # Fetch raw metrics for each missing range to validate if API returns anything
-        for r_start, r_end in ranges:
-            raw = fetch_raw_metrics(r_start, r_end)
+        # Fetch raw metrics for each missing range to validate if API returns
+        # anything; the probes are independent HTTPS calls, so run them
+        # concurrently instead of paying a round-trip per gap
+        with ThreadPoolExecutor(max_workers=min(8, len(ranges))) as pool:
+            raws = list(pool.map(lambda rr: fetch_raw_metrics(*rr), ranges))
+        for (r_start, r_end), raw in zip(ranges, raws):
             error = None
             if raw and isinstance(raw, list) and "error" in raw[0]:
                 error = raw[0]["error"]
@@ -67,8 +73,8 @@ def find_missing_dates(days_back: int = 30) -> Dict[str, Any]:
     return {
         "start": start,
         "end": end,
-        "expected_days": len(expected_dates),
-        "present_days": len(present_dates),
+        "expected_days": int(expected.size),
+        "present_days": int(present.size),
         "missing_count": len(missing),
         "missing_dates": missing,
         "api_probe": api_raw_missing,
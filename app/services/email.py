@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 from typing import Any, Dict, Optional
 
 from app.utils.settings import settings
@@ -15,7 +16,10 @@ class EmailClient:
         self.api_key = settings.resend_api_key
         self.default_from = settings.resend_from_email
         self.default_to = settings.head_coach_email
-        
+        # Immutable fields shared by every send; per-call params are built
+        # by merging over this instead of rebuilding the dict from settings
+        self._base_params = {"from": self.default_from}
+
         # Set API key for resend module
         if self.api_key and resend:
             resend.api_key = self.api_key
@@ -45,17 +49,17 @@ class EmailClient:
             print(f"[Email Fallback] To={to_email} Subject={subject}\n{body}")
             return {"status": "logged", "reason": "no_api_key"}
         
-        sender = from_email or self.default_from
-        
         try:
             # Resend API call
             params = {
-                "from": sender,
+                **self._base_params,
                 "to": [to_email],
                 "subject": subject,
                 "text": body,
             }
-            
+            if from_email:
+                params["from"] = from_email
+
             response = resend.Emails.send(params)
             
             # Resend returns a dict with 'id' on success or raises exception
@@ -76,6 +80,52 @@ class EmailClient:
             print(f"[Email Error] {exc}")
             return {"status": "error", "error": str(exc)}
 
+    def send_batch(self, to_emails: list[str], subject: str, body: str, from_email: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Send the same plain text email to many recipients in one API call.
+
+        Uses Resend's batch endpoint, so a fan-out of N recipients costs a
+        single HTTPS round-trip instead of N serial sends.
+
+        Args:
+            to_emails: Recipient email addresses
+            subject: Email subject
+            body: Plain text email body
+            from_email: Optional sender email (defaults to RESEND_FROM_EMAIL)
+
+        Returns:
+            Dictionary with status and response data
+        """
+        recipients = [e for e in to_emails if e]
+        if not recipients:
+            return {"status": "error", "error": "missing_recipient"}
+
+        if not resend or not self.api_key:
+            for to_email in recipients:
+                print(f"[Email Fallback] To={to_email} Subject={subject}\n{body}")
+            reason = "resend_not_installed" if not resend else "no_api_key"
+            return {"status": "logged", "reason": reason}
+
+        base = dict(self._base_params)
+        if from_email:
+            base["from"] = from_email
+        batch = [
+            {**base, "to": [to_email], "subject": subject, "text": body}
+            for to_email in recipients
+        ]
+
+        try:
+            response = resend.Batch.send(batch)
+            return {
+                "status": "sent",
+                "count": len(batch),
+                "provider": "resend",
+                "response": response,
+            }
+        except Exception as exc:  # noqa: BLE001 - capture provider errors verbatim
+            print(f"[Email Error] {exc}")
+            return {"status": "error", "error": str(exc)}
+
     def send_daily_summary(self, to_email: str, subject: str, body: str) -> Dict[str, Any]:
         """
         Send a daily summary email (alias for send_text_email for backward compatibility).
@@ -91,4 +141,19 @@ class EmailClient:
         return self.send_text_email(to_email=to_email, subject=subject, body=body)
 
 
-email_client = EmailClient()
+@functools.cache
+def get_email_client() -> EmailClient:
+    """Return the process-wide EmailClient, constructed on first use.
+
+    Deferring construction keeps settings reads and the resend API-key
+    side effect out of module import time.
+    """
+    return EmailClient()
+
+
+def __getattr__(name: str) -> Any:
+    # Backward compatibility: `from app.services.email import email_client`
+    # still works, but the client is only built when first imported/accessed.
+    if name == "email_client":
+        return get_email_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,14 +3,16 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date
-from typing import Dict, Optional
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable, Dict, List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, exists, select
 
 from app.data.db import get_session
-from app.models.tables import DailyMetric, EmailLog
-from app.services.baseline import METRIC_CONFIGS, get_baseline
-from app.services.email import email_client
+from app.models.tables import BaselineMetric, DailyMetric, EmailLog
+from app.services.baseline import METRIC_CONFIGS, get_best_baselines
+from app.services.email import get_email_client
 from app.utils.dates import get_effective_today
 from app.utils.settings import settings
 
@@ -18,6 +20,19 @@ ALERT_EMAIL_TYPE = "recovery_alert"
 BASELINE_WINDOW_PRIORITY = ["annual", "semiannual", "quarterly", "monthly"]
 DEFAULT_THRESHOLD = 0.05
 
+# Per-metric accessors and config flags resolved once at import; attrgetter
+# skips the string getattr and the precomputed flags drop the METRIC_CONFIGS
+# dict lookups from the per-evaluation hot path
+_RECOVERY_METRICS = tuple(
+    (
+        name,
+        attrgetter(METRIC_CONFIGS[name]["db_field"]),
+        METRIC_CONFIGS[name]["higher_is_better"],
+        "below" if METRIC_CONFIGS[name]["higher_is_better"] else "above",
+    )
+    for name in ("hrv", "sleep_hours", "rhr")
+)
+
 
 @dataclass
 class MetricStatus:
@@ -38,18 +53,29 @@ class MetricStatus:
         }
 
 
-def _get_metric_status(metric_name: str, value: Optional[float], threshold: float, baseline_value: Optional[float]) -> MetricStatus:
-    config = METRIC_CONFIGS[metric_name]
-    direction = "below" if config["higher_is_better"] else "above"
+@lru_cache(maxsize=32)
+def _make_breach_check(higher_is_better: bool, threshold: float) -> Callable[[float], bool]:
+    """Closure testing whether a delta breaches the threshold; memoized so the
+    per-metric inner call is a straight comparison with no branching."""
+    if higher_is_better:
+        limit = -threshold
+        return lambda delta: delta <= limit
+    return lambda delta: delta >= threshold
+
+
+def _get_metric_status(
+    metric_name: str,
+    value: Optional[float],
+    baseline_value: Optional[float],
+    breach_check: Callable[[float], bool],
+    direction: str,
+) -> MetricStatus:
     breached = False
     delta_pct: Optional[float] = None
 
     if value is not None and baseline_value not in (None, 0):
         delta_pct = (value - baseline_value) / baseline_value
-        if config["higher_is_better"]:
-            breached = delta_pct <= -threshold
-        else:
-            breached = delta_pct >= threshold
+        breached = breach_check(delta_pct)
 
     return MetricStatus(
         name=metric_name,
@@ -61,21 +87,26 @@ def _get_metric_status(metric_name: str, value: Optional[float], threshold: floa
     )
 
 
-def _select_baseline(athlete_id: int, metric_name: str) -> Optional[float]:
-    for window in BASELINE_WINDOW_PRIORITY:
-        baseline = get_baseline(athlete_id, metric_name, window)
-        if baseline and baseline.mean is not None:
-            return baseline.mean
-    return None
-
-
-def _already_sent(session, athlete_id: int, check_date: date) -> bool:
-    stmt = select(EmailLog).where(
-        EmailLog.athlete_id == athlete_id,
+def _already_sent_expr(check_date: date):
+    """EXISTS clause for "alert already e-mailed today", correlated to the
+    DailyMetric row so the metric load and the dedup probe share one SELECT."""
+    return exists().where(
+        EmailLog.athlete_id == DailyMetric.athlete_id,
         EmailLog.date == check_date,
         EmailLog.email_type == ALERT_EMAIL_TYPE,
     )
-    return session.execute(stmt).first() is not None
+
+
+# Single-athlete fused select built once at import (tokens.py pattern); the
+# bulk variant stays inline because its IN clause is an expanding bind that
+# SQLAlchemy already caches by shape
+_STMT_METRIC_WITH_SENT = select(
+    DailyMetric,
+    _already_sent_expr(bindparam("check_date")).label("already_sent"),
+).where(
+    DailyMetric.athlete_id == bindparam("aid"),
+    DailyMetric.date == bindparam("check_date"),
+)
 
 
 def _record_email(session, athlete_id: int, check_date: date, status: str):
@@ -101,6 +132,99 @@ def _format_metric_line(label: str, metric: MetricStatus) -> str:
     )
 
 
+def _evaluate_for_athlete(
+    session,
+    athlete_id: int,
+    check_date: date,
+    threshold: float,
+    metric: Optional[DailyMetric],
+    baseline_for: Callable[[str], Optional[float]],
+    already_sent: bool,
+) -> Dict[str, object]:
+    """Shared evaluation/dispatch core for single and bulk alert paths."""
+    if metric is None:
+        return {
+            "triggered": False,
+            "reason": "no_metric_for_day",
+            "check_date": check_date.isoformat(),
+            "metrics": {},
+        }
+
+    statuses: Dict[str, MetricStatus] = {}
+    for name, value_of, higher_is_better, direction in _RECOVERY_METRICS:
+        statuses[name] = _get_metric_status(
+            name,
+            value_of(metric),
+            baseline_for(name),
+            _make_breach_check(higher_is_better, threshold),
+            direction,
+        )
+
+    required_metrics = [statuses["sleep_hours"], statuses["hrv"], statuses["rhr"]]
+    if not all(s.baseline not in (None, 0) and s.current is not None for s in required_metrics):
+        return {
+            "triggered": False,
+            "reason": "insufficient_baseline_or_metric",
+            "check_date": check_date.isoformat(),
+            "metrics": {k: v.to_dict() for k, v in statuses.items()},
+        }
+
+    sleep_status = statuses["sleep_hours"]
+    hrv_status = statuses["hrv"]
+    rhr_status = statuses["rhr"]
+
+    trigger_sleep = sleep_status.breached
+    trigger_combo = hrv_status.breached and rhr_status.breached
+    triggered = trigger_sleep or trigger_combo
+
+    if triggered:
+        if trigger_sleep and trigger_combo:
+            trigger_reason = "sleep_and_hrv_rhr_breach"
+        elif trigger_sleep:
+            trigger_reason = "sleep_breach"
+        else:
+            trigger_reason = "hrv_rhr_breach"
+    else:
+        trigger_reason = "conditions_not_met"
+
+    result = {
+        "triggered": triggered,
+        "reason": trigger_reason,
+        "check_date": check_date.isoformat(),
+        "metrics": {k: v.to_dict() for k, v in statuses.items()},
+    }
+
+    if not triggered:
+        return result
+
+    if already_sent:
+        result["reason"] = "already_sent"
+        return result
+
+    to_address = settings.head_coach_email
+    subject = f"Recovery Alert for {check_date.isoformat()}"
+    lead = {
+        "sleep_breach": "Sleep hours dropped below baseline threshold.",
+        "hrv_rhr_breach": "HRV and Resting HR jointly breached baseline thresholds.",
+        "sleep_and_hrv_rhr_breach": "Multiple recovery indicators breached their baselines.",
+    }.get(trigger_reason, "Recovery indicators signal elevated fatigue.")
+
+    lines = [
+        lead,
+        _format_metric_line("Sleep Hours", statuses["sleep_hours"]),
+        _format_metric_line("HRV", statuses["hrv"]),
+        _format_metric_line("Resting HR", statuses["rhr"]),
+        "\nRecommend checking in with the athlete and adjusting training if necessary.",
+    ]
+    body = "\n".join(lines)
+
+    send_result = get_email_client().send_daily_summary(to_address, subject, body)
+    status = send_result.get("status", "unknown") if isinstance(send_result, dict) else str(send_result)
+    _record_email(session, athlete_id, check_date, status)
+    result["email_status"] = status
+    return result
+
+
 def evaluate_recovery_alert(
     athlete_id: int,
     check_date: Optional[date] = None,
@@ -110,92 +234,104 @@ def evaluate_recovery_alert(
     check_date = check_date or get_effective_today()
 
     with get_session() as session:
-        metric = session.execute(
-            select(DailyMetric).where(
-                DailyMetric.athlete_id == athlete_id,
-                DailyMetric.date == check_date,
-            )
-        ).scalars().first()
-
-        if metric is None:
-            return {
-                "triggered": False,
-                "reason": "no_metric_for_day",
-                "check_date": check_date.isoformat(),
-                "metrics": {},
-            }
-
-        statuses = {
-            name: _get_metric_status(
-                name,
-                getattr(metric, config["db_field"]),
-                threshold,
-                _select_baseline(athlete_id, name),
-            )
-            for name, config in METRIC_CONFIGS.items()
-            if name in {"hrv", "sleep_hours", "rhr"}
-        }
-
-        required_metrics = [statuses["sleep_hours"], statuses["hrv"], statuses["rhr"]]
-        if not all(s.baseline not in (None, 0) and s.current is not None for s in required_metrics):
-            return {
-                "triggered": False,
-                "reason": "insufficient_baseline_or_metric",
-                "check_date": check_date.isoformat(),
-                "metrics": {k: v.to_dict() for k, v in statuses.items()},
-            }
-
-        sleep_status = statuses["sleep_hours"]
-        hrv_status = statuses["hrv"]
-        rhr_status = statuses["rhr"]
-
-        trigger_sleep = sleep_status.breached
-        trigger_combo = hrv_status.breached and rhr_status.breached
-        triggered = trigger_sleep or trigger_combo
-
-        if triggered:
-            if trigger_sleep and trigger_combo:
-                trigger_reason = "sleep_and_hrv_rhr_breach"
-            elif trigger_sleep:
-                trigger_reason = "sleep_breach"
-            else:
-                trigger_reason = "hrv_rhr_breach"
+        # Metric and "already e-mailed" flag in one round-trip instead of a
+        # second EmailLog probe after the trigger decision
+        row = session.execute(
+            _STMT_METRIC_WITH_SENT, {"aid": athlete_id, "check_date": check_date}
+        ).first()
+        if row is not None:
+            metric, already_sent = row[0], bool(row[1])
         else:
-            trigger_reason = "conditions_not_met"
+            metric, already_sent = None, False
 
-        result = {
-            "triggered": triggered,
-            "reason": trigger_reason,
-            "check_date": check_date.isoformat(),
-            "metrics": {k: v.to_dict() for k, v in statuses.items()},
+        # One round-trip returning the best baseline per metric; the window
+        # priority walk happens inside the query
+        baselines = get_best_baselines(
+            athlete_id, ("hrv", "sleep_hours", "rhr"), BASELINE_WINDOW_PRIORITY
+        )
+
+        def _baseline_for(name: str) -> Optional[float]:
+            baseline = baselines.get(name)
+            return baseline.mean if baseline is not None else None
+
+        return _evaluate_for_athlete(
+            session,
+            athlete_id,
+            check_date,
+            threshold,
+            metric,
+            _baseline_for,
+            already_sent,
+        )
+
+
+def evaluate_recovery_alerts_bulk(
+    athlete_ids: List[int],
+    check_date: Optional[date] = None,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> Dict[int, Dict[str, object]]:
+    """Evaluate recovery alerts for many athletes with two batched queries.
+
+    Fetches the day's metrics and all baselines in one round-trip each
+    (instead of per-athlete queries), then evaluates and dispatches alerts
+    in memory. Returns a mapping of athlete_id -> result dict; per-athlete
+    failures are captured under an "error" reason rather than aborting the
+    batch.
+    """
+    check_date = check_date or get_effective_today()
+    results: Dict[int, Dict[str, object]] = {}
+    if not athlete_ids:
+        return results
+
+    with get_session() as session:
+        metrics_by_athlete = {
+            m.athlete_id: (m, bool(sent))
+            for m, sent in session.execute(
+                select(
+                    DailyMetric,
+                    _already_sent_expr(check_date).label("already_sent"),
+                ).where(
+                    DailyMetric.athlete_id.in_(athlete_ids),
+                    DailyMetric.date == check_date,
+                )
+            )
         }
 
-        if not triggered:
-            return result
-
-        if _already_sent(session, athlete_id, check_date):
-            result["reason"] = "already_sent"
-            return result
-
-        to_address = settings.head_coach_email
-        subject = f"Recovery Alert for {check_date.isoformat()}"
-        lead = {
-            "sleep_breach": "Sleep hours dropped below baseline threshold.",
-            "hrv_rhr_breach": "HRV and Resting HR jointly breached baseline thresholds.",
-            "sleep_and_hrv_rhr_breach": "Multiple recovery indicators breached their baselines.",
-        }.get(trigger_reason, "Recovery indicators signal elevated fatigue.")
-
-        lines = [
-            lead,
-            _format_metric_line("Sleep Hours", statuses["sleep_hours"]),
-            _format_metric_line("HRV", statuses["hrv"]),
-            _format_metric_line("Resting HR", statuses["rhr"]),
-            "\nRecommend checking in with the athlete and adjusting training if necessary.",
-        ]
-        body = "\n".join(lines)
-
-        send_result = email_client.send_daily_summary(to_address, subject, body)
-        status = send_result.get("status", "unknown") if isinstance(send_result, dict) else str(send_result)
-        _record_email(session, athlete_id, check_date, status)
-        result["email_status"] = status
-        return result
+        baseline_rows = session.execute(
+            select(BaselineMetric)
+            .where(BaselineMetric.athlete_id.in_(athlete_ids))
+            .order_by(BaselineMetric.created_at.desc())
+        ).scalars().all()
+        # Newest row wins per (athlete, metric, window), matching get_baseline
+        baselines: Dict[tuple, BaselineMetric] = {}
+        for row in baseline_rows:
+            baselines.setdefault((row.athlete_id, row.metric_name, row.window_type), row)
+
+        def _baseline_for(athlete_id: int, metric_name: str) -> Optional[float]:
+            for window in BASELINE_WINDOW_PRIORITY:
+                baseline = baselines.get((athlete_id, metric_name, window))
+                if baseline and baseline.mean is not None:
+                    return baseline.mean
+            return None
+
+        for athlete_id in athlete_ids:
+            try:
+                metric, already_sent = metrics_by_athlete.get(athlete_id, (None, False))
+                results[athlete_id] = _evaluate_for_athlete(
+                    session,
+                    athlete_id,
+                    check_date,
+                    threshold,
+                    metric,
+                    lambda name, _aid=athlete_id: _baseline_for(_aid, name),
+                    already_sent,
+                )
+            except Exception as e:  # noqa: BLE001 - isolate per-athlete failures
+                results[athlete_id] = {
+                    "triggered": False,
+                    "reason": "error",
+                    "error": str(e),
+                    "check_date": check_date.isoformat(),
+                    "metrics": {},
+                }
+    return results
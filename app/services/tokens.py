@@ -1,15 +1,67 @@
+import time
+from contextlib import nullcontext
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import select, delete
+from sqlalchemy import bindparam, func, select, delete
 from app.data.db import get_session
 from app.models.tables import OAuthToken
 
+# Short-lived in-process cache so a burst of segmented API calls (each of
+# which builds auth headers) does one token lookup instead of one per HTTP
+# request. Entries expire after _TOKEN_CACHE_TTL seconds or one minute
+# before the token itself does, whichever comes first; store/delete
+# invalidate eagerly. Misses (no token stored) are never cached so a fresh
+# authorization is visible immediately.
+_TOKEN_CACHE_TTL = 300
+_COACH_CACHE_KEY = "coach"
+_token_cache: dict = {}
 
-def store_token(athlete_id: int, token: dict):
+
+def _cache_get(key):
+    entry = _token_cache.get(key)
+    if entry is not None:
+        deadline, token = entry
+        if time.monotonic() < deadline:
+            return token
+        _token_cache.pop(key, None)
+    return None
+
+
+def _cache_put(key, token):
+    ttl = float(_TOKEN_CACHE_TTL)
+    if token.expires_at is not None:
+        remaining = (token.expires_at - datetime.now(timezone.utc)).total_seconds() - 60
+        ttl = min(ttl, remaining)
+    if ttl > 0:
+        _token_cache[key] = (time.monotonic() + ttl, token)
+
+# Statements built once at import; per-call Core construction disappears and
+# the engine's compiled-statement cache keys stay stable (same pattern as the
+# compliance lookup statement)
+_STMT_GET_TOKEN = select(OAuthToken).where(OAuthToken.athlete_id == bindparam("aid"))
+_STMT_DELETE_TOKEN = delete(OAuthToken).where(OAuthToken.athlete_id == bindparam("aid"))
+_STMT_COACH_TOKEN = (
+    select(OAuthToken)
+    .where(func.lower(OAuthToken.scope).like("%coach:athletes%"))
+    .order_by(OAuthToken.expires_at.desc())
+    .limit(1)
+)
+
+
+def _session_scope(session=None):
+    """Reuse the caller's session when provided, else open a fresh one.
+
+    Multi-step flows (token refresh: load, store, reload) can share a single
+    pooled connection instead of paying a checkout/checkin per helper call.
+    """
+    return nullcontext(session) if session is not None else get_session()
+
+
+def store_token(athlete_id: int, token: dict, session=None):
     expires_in = token.get("expires_in", 3600)
     expires_at = datetime.now(timezone.utc) + timedelta(seconds=int(expires_in))
-    with get_session() as session:
+    with _session_scope(session) as session:
         # remove old tokens for athlete
-        session.execute(delete(OAuthToken).where(OAuthToken.athlete_id == athlete_id))
+        session.execute(_STMT_DELETE_TOKEN, {"aid": athlete_id})
         record = OAuthToken(
             athlete_id=athlete_id,
             access_token=token.get("access_token"),
@@ -19,32 +71,43 @@ def store_token(athlete_id: int, token: dict):
         )
         session.add(record)
         session.commit()
-        session.refresh(record)
+        # No refresh: expire_on_commit=False keeps the just-written attributes
+        # (including the flushed id) valid without a reload SELECT
+        _token_cache.pop(athlete_id, None)
+        _token_cache.pop(_COACH_CACHE_KEY, None)
         return record
 
 
-def get_token(athlete_id: int):
-    with get_session() as session:
-        stmt = select(OAuthToken).where(OAuthToken.athlete_id == athlete_id)
-        return session.execute(stmt).scalars().first()
+def get_token(athlete_id: int, session=None):
+    token = _cache_get(athlete_id)
+    if token is not None:
+        return token
+    with _session_scope(session) as session:
+        token = session.execute(_STMT_GET_TOKEN, {"aid": athlete_id}).scalars().first()
+    if token is not None:
+        _cache_put(athlete_id, token)
+    return token
 
 
-def delete_token(athlete_id: int):
+def delete_token(athlete_id: int, session=None):
     """Remove stored token for an athlete (used after refresh failure)."""
-    with get_session() as session:
-        session.execute(delete(OAuthToken).where(OAuthToken.athlete_id == athlete_id))
+    with _session_scope(session) as session:
+        session.execute(_STMT_DELETE_TOKEN, {"aid": athlete_id})
         session.commit()
+    _token_cache.pop(athlete_id, None)
+    _token_cache.pop(_COACH_CACHE_KEY, None)
 
 
-def find_coach_token():
+def find_coach_token(session=None):
     """Return an OAuthToken that has coach:athletes scope, if any.
 
     Chooses the most recent (by expires_at) token with the required scope.
     """
-    with get_session() as session:
-        stmt = select(OAuthToken).order_by(OAuthToken.expires_at.desc())
-        for tok in session.execute(stmt).scalars().all():
-            scope = (tok.scope or "").lower()
-            if "coach:athletes" in scope:
-                return tok
-    return None
+    token = _cache_get(_COACH_CACHE_KEY)
+    if token is not None:
+        return token
+    with _session_scope(session) as session:
+        token = session.execute(_STMT_COACH_TOKEN).scalars().first()
+    if token is not None:
+        _cache_put(_COACH_CACHE_KEY, token)
+    return token
@@ -1,47 +1,173 @@
+import logging
+import time
+
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta, timezone
+from urllib3.util.retry import Retry
 from app.utils.settings import settings
+from app.data.db import get_session
 from app.services.tokens import get_token, store_token, delete_token, find_coach_token
 from app.services.athletes import get_or_create_demo_athlete, get_athlete_by_id
 from app.auth.oauth import refresh_token as oauth_refresh
 
 API_BASE = settings.tp_api_base.rstrip('/')
 
+log = logging.getLogger(__name__)
+
+
+def _masked_headers(headers: dict) -> dict:
+    """Headers safe for logging: bearer token truncated. Only built when
+    debug logging is actually enabled."""
+    return {
+        k: v[:20] + '...' if k == 'Authorization' else v
+        for k, v in headers.items()
+    }
+
+# Concurrent segment fetches per range request; keeps burst size friendly to
+# TrainingPeaks rate limits while still overlapping the HTTP round-trips
+_SEGMENT_WORKERS = 5
+
+# Parsed metrics responses cached per (athlete, window). TP does not emit
+# ETags, so this is a local freshness cache: windows touching today expire
+# after five minutes, older windows after six hours — history is mostly
+# stable but athletes do backfill past dates (see HRV_FIX.md), so nothing
+# is cached forever. Full historical syncs clear the cache outright so a
+# deliberate re-sync always refetches. The daily alert loop and UI
+# refreshes re-request the same ranges constantly; this turns those
+# repeats into dict hits.
+_METRICS_CACHE_TTL = 300
+_METRICS_CACHE_HISTORY_TTL = 6 * 3600
+_METRICS_CACHE_MAX = 512
+_metrics_cache: dict = {}
+
+
+def clear_metrics_cache() -> None:
+    """Drop all cached metrics segments.
+
+    Called by the historical sync paths: after a TrainingPeaks backfill the
+    whole point of "Sync Last 365 Days" is to refetch past windows.
+    """
+    _metrics_cache.clear()
+
+
+def _metrics_cache_get(key):
+    entry = _metrics_cache.get(key)
+    if entry is None:
+        return None
+    deadline, data = entry
+    if time.monotonic() >= deadline:
+        _metrics_cache.pop(key, None)
+        return None
+    return list(data)
+
+
+def _metrics_cache_put(key, end_date: date, data):
+    if len(_metrics_cache) >= _METRICS_CACHE_MAX:
+        # Bound memory by dropping the oldest quarter (dicts keep insertion order)
+        for old_key in list(_metrics_cache)[: _METRICS_CACHE_MAX // 4]:
+            _metrics_cache.pop(old_key, None)
+    if end_date < date.today() - timedelta(days=2):
+        deadline = time.monotonic() + _METRICS_CACHE_HISTORY_TTL
+    else:
+        deadline = time.monotonic() + _METRICS_CACHE_TTL
+    _metrics_cache[key] = (deadline, list(data))
+
+
+def _fetch_segments(call_segment, start_date: date, end_date: date):
+    """Split a range into 45-day windows (TP's max) and fetch them concurrently.
+
+    Segments are issued through a bounded thread pool and merged in window
+    order (newest first, matching the old serial loop), so total latency is
+    roughly one round-trip instead of one per segment.
+    """
+    pairs = []
+    cur_end = end_date
+    step = 45  # TrainingPeaks maximum
+    while cur_end >= start_date:
+        cur_start = max(start_date, cur_end - timedelta(days=step - 1))
+        pairs.append((cur_start, cur_end))
+        if cur_start == start_date:
+            break
+        cur_end = cur_start - timedelta(days=1)
+    if len(pairs) == 1:
+        return call_segment(*pairs[0])
+    out = []
+    with ThreadPoolExecutor(max_workers=min(_SEGMENT_WORKERS, len(pairs))) as pool:
+        for seg in pool.map(lambda pair: call_segment(*pair), pairs):
+            out.extend(seg)
+    return out
+
+
 class TrainingPeaksAPI:
     def __init__(self, athlete_id: int):
         self.athlete_id = athlete_id
         self._using_coach_token = False  # Track if we're using a coach token fallback
+        # Instance-lifetime access-token cache: a segmented fetch builds
+        # headers once per HTTP call, and each build would otherwise re-run
+        # the full token lookup
+        self._cached_access_token = None
+        self._cached_token_exp = None
+        # Pooled session keeps TLS connections alive across segmented calls
+        # (same motivation as oauth._token_session); pool size matches the
+        # segment worker count, with retries for transient TP hiccups
+        self._http = requests.Session()
+        self._http.mount(
+            "https://",
+            requests.adapters.HTTPAdapter(
+                pool_connections=_SEGMENT_WORKERS,
+                pool_maxsize=_SEGMENT_WORKERS + 3,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.3,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                ),
+            ),
+        )
 
     def _get_access_token(self):
-        token_row = get_token(self.athlete_id)
-        if not token_row:
-            # Fallback: use a coach token (for coach-mode operations on roster athletes)
-            coach_tok = find_coach_token()
-            if not coach_tok:
-                raise RuntimeError("No OAuth token stored for this athlete and no coach token found. Connect TrainingPeaks as Coach.")
-            token_row = coach_tok
-            self._using_coach_token = True
-        else:
-            self._using_coach_token = False
-        # simplistic expiry check (1 min buffer)
-        try:
-            if token_row.expires_at and (token_row.expires_at - timedelta(minutes=1)) < datetime.now(timezone.utc):
-                new_token = oauth_refresh(token_row.refresh_token)
-                # If this is a coach token applied to a roster athlete, persist refresh under the owning athlete id
-                # by simply updating the same record's owning athlete id. We will store it under the original token owner.
-                # For simplicity, keep it associated with the original token's athlete_id.
-                store_token(token_row.athlete_id, new_token)
-                # Reload whichever token we refreshed (coach or athlete-specific)
-                token_row = get_token(token_row.athlete_id)
-            if not token_row or not token_row.access_token:
-                raise RuntimeError("Stored OAuth token missing access_token; please re-authorize.")
-            return token_row.access_token
-        except RuntimeError:
-            # purge invalid token so UI logic can show re-auth button immediately
-            # Only delete if it was the athlete's own token; preserve coach token if used
-            if token_row and token_row.athlete_id == self.athlete_id:
-                delete_token(self.athlete_id)
-            raise
+        if self._cached_access_token and (
+            self._cached_token_exp is None
+            or (self._cached_token_exp - timedelta(minutes=1)) > datetime.now(timezone.utc)
+        ):
+            return self._cached_access_token
+        # One session for the whole lookup/refresh/reload flow; the token
+        # helpers each open their own otherwise, which costs a pool
+        # checkout/checkin per call (three on a refresh)
+        with get_session() as session:
+            token_row = get_token(self.athlete_id, session=session)
+            if not token_row:
+                # Fallback: use a coach token (for coach-mode operations on roster athletes)
+                coach_tok = find_coach_token(session=session)
+                if not coach_tok:
+                    raise RuntimeError("No OAuth token stored for this athlete and no coach token found. Connect TrainingPeaks as Coach.")
+                token_row = coach_tok
+                self._using_coach_token = True
+            else:
+                self._using_coach_token = False
+            # simplistic expiry check (1 min buffer)
+            try:
+                if token_row.expires_at and (token_row.expires_at - timedelta(minutes=1)) < datetime.now(timezone.utc):
+                    new_token = oauth_refresh(token_row.refresh_token)
+                    # If this is a coach token applied to a roster athlete, persist refresh under the owning athlete id
+                    # by simply updating the same record's owning athlete id. We will store it under the original token owner.
+                    # For simplicity, keep it associated with the original token's athlete_id.
+                    store_token(token_row.athlete_id, new_token, session=session)
+                    # Reload whichever token we refreshed (coach or athlete-specific)
+                    token_row = get_token(token_row.athlete_id, session=session)
+                if not token_row or not token_row.access_token:
+                    raise RuntimeError("Stored OAuth token missing access_token; please re-authorize.")
+                self._cached_access_token = token_row.access_token
+                self._cached_token_exp = token_row.expires_at
+                return token_row.access_token
+            except RuntimeError:
+                # purge invalid token so UI logic can show re-auth button immediately
+                # Only delete if it was the athlete's own token; preserve coach token if used
+                self._cached_access_token = None
+                self._cached_token_exp = None
+                if token_row and token_row.athlete_id == self.athlete_id:
+                    delete_token(self.athlete_id, session=session)
+                raise
 
     def _headers(self):
         return {
@@ -58,23 +184,17 @@ class TrainingPeaksAPI:
                 # Use athlete-scoped endpoint (works for both athlete tokens and coach tokens with proper permissions)
                 url = f"{API_BASE}/v2/workouts/{tp_athlete_id}/{s.isoformat()}/{e.isoformat()}"
                 headers = self._headers()
-                r = requests.get(url, headers=headers, timeout=30)
-                
-                # DEBUG: Log details on non-200 responses
-                if r.status_code != 200:
-                    error_body = ""
-                    try:
-                        error_body = r.text[:500]
-                    except:
-                        pass
-                    print(f"\n=== WORKOUTS API DEBUG ===")
-                    print(f"URL: {url}")
-                    print(f"Status: {r.status_code}")
-                    print(f"Using coach token: {self._using_coach_token}")
-                    print(f"Headers (token masked): {dict((k, v[:20]+'...' if k == 'Authorization' else v) for k,v in headers.items())}")
-                    print(f"Response body: {error_body}")
-                    print(f"========================\n")
+                r = self._http.get(url, headers=headers, timeout=30)
                 
+                # Lazy debug logging: the masked-headers dict and body slice
+                # are only built when DEBUG is actually enabled
+                if r.status_code != 200 and log.isEnabledFor(logging.DEBUG):
+                    log.debug(
+                        "workouts API %s -> %s (coach token: %s) headers=%s body=%s",
+                        url, r.status_code, self._using_coach_token,
+                        _masked_headers(headers), r.text[:500],
+                    )
+
                 if r.status_code == 403:
                     # Get token details for debugging
                     token_row = get_token(self.athlete_id) or find_coach_token()
@@ -88,7 +208,7 @@ class TrainingPeaksAPI:
                 return r.json() or []
             else:
                 url = f"{API_BASE}/v2/workouts/{s.isoformat()}/{e.isoformat()}"
-                r = requests.get(url, headers=self._headers(), timeout=30)
+                r = self._http.get(url, headers=self._headers(), timeout=30)
                 r.raise_for_status()
                 return r.json() or []
 
@@ -100,43 +220,35 @@ class TrainingPeaksAPI:
             status = getattr(e.response, 'status_code', None)
             if status not in (400, 403):
                 raise
-            # Segment into 45-day windows (TP's max) and merge
-            out = []
-            cur_end = end_date
-            step = 45  # TrainingPeaks maximum
-            while cur_end >= start_date:
-                cur_start = max(start_date, cur_end - timedelta(days=step - 1))
-                seg = call_segment(cur_start, cur_end)
-                out.extend(seg)
-                if cur_start == start_date:
-                    break
-                cur_end = cur_start - timedelta(days=1)
-            return out
+            # Segment into 45-day windows (TP's max) and fetch concurrently
+            return _fetch_segments(call_segment, start_date, end_date)
 
     def fetch_daily_metrics_range(self, start_date: date, end_date: date, tp_athlete_id: int | None = None):
         # Coach tokens WITH metrics:read scope CAN use athlete-scoped endpoints
         def call_segment(s: date, e: date):
+            key = (self.athlete_id, tp_athlete_id, s, e)
+            cached = _metrics_cache_get(key)
+            if cached is not None:
+                return cached
+            data = fetch_segment(s, e)
+            _metrics_cache_put(key, e, data)
+            return data
+
+        def fetch_segment(s: date, e: date):
             if tp_athlete_id:
                 # Use athlete-scoped endpoint (works for both athlete tokens and coach tokens with proper permissions)
                 url = f"{API_BASE}/v2/metrics/{tp_athlete_id}/{s.isoformat()}/{e.isoformat()}"
                 headers = self._headers()
-                r = requests.get(url, headers=headers, timeout=30)
-                
-                # DEBUG: Log details on non-200/404 responses
-                if r.status_code not in (200, 404):
-                    error_body = ""
-                    try:
-                        error_body = r.text[:500]
-                    except:
-                        pass
-                    print(f"\n=== METRICS API DEBUG ===")
-                    print(f"URL: {url}")
-                    print(f"Status: {r.status_code}")
-                    print(f"Using coach token: {self._using_coach_token}")
-                    print(f"Headers (token masked): {dict((k, v[:20]+'...' if k == 'Authorization' else v) for k,v in headers.items())}")
-                    print(f"Response body: {error_body}")
-                    print(f"========================\n")
+                r = self._http.get(url, headers=headers, timeout=30)
                 
+                # Lazy debug logging, same shape as the workouts path
+                if r.status_code not in (200, 404) and log.isEnabledFor(logging.DEBUG):
+                    log.debug(
+                        "metrics API %s -> %s (coach token: %s) headers=%s body=%s",
+                        url, r.status_code, self._using_coach_token,
+                        _masked_headers(headers), r.text[:500],
+                    )
+
                 if r.status_code == 404:
                     return []
                 if r.status_code == 403:
@@ -152,7 +264,7 @@ class TrainingPeaksAPI:
                 return r.json() or []
             else:
                 url = f"{API_BASE}/v2/metrics/{s.isoformat()}/{e.isoformat()}"
-                r = requests.get(url, headers=self._headers(), timeout=30)
+                r = self._http.get(url, headers=self._headers(), timeout=30)
                 if r.status_code == 404:
                     return []
                 r.raise_for_status()
@@ -165,17 +277,7 @@ class TrainingPeaksAPI:
             status = getattr(e.response, 'status_code', None)
             if status not in (400, 403):
                 raise
-            out = []
-            cur_end = end_date
-            step = 45  # TrainingPeaks maximum
-            while cur_end >= start_date:
-                cur_start = max(start_date, cur_end - timedelta(days=step - 1))
-                seg = call_segment(cur_start, cur_end)
-                out.extend(seg)
-                if cur_start == start_date:
-                    break
-                cur_end = cur_start - timedelta(days=1)
-            return out
+            return _fetch_segments(call_segment, start_date, end_date)
 
     def fetch_coach_athletes(self):
         """Fetch coach roster (requires coach:athletes scope).
@@ -183,7 +285,7 @@ class TrainingPeaksAPI:
         Returns list of athletes with keys like Id, FirstName, LastName, Email, etc.
         """
         url = f"{API_BASE}/v1/coach/athletes"
-        r = requests.get(url, headers=self._headers(), timeout=30)
+        r = self._http.get(url, headers=self._headers(), timeout=30)
         # If scope is missing or user is not a coach, TP may return 403
         if r.status_code == 403:
             # Surface a clear message to the caller
@@ -200,7 +302,7 @@ class TrainingPeaksAPI:
             url = f"{API_BASE}/v2/workouts/{tp_athlete_id}/{workout_id}"
         else:
             url = f"{API_BASE}/v2/workouts/{workout_id}"
-        r = requests.get(url, headers=self._headers(), timeout=30)
+        r = self._http.get(url, headers=self._headers(), timeout=30)
         if r.status_code == 404:
             return None
         r.raise_for_status()
@@ -1,14 +1,25 @@
 """Date utilities for handling sandbox offsets and effective timelines."""
 from __future__ import annotations
 
+import time
 from datetime import date, timedelta
+from functools import lru_cache
 
 from app.utils.settings import settings
 
 
-def get_effective_today() -> date:
-    """Return the logical "today" taking sandbox offset into account."""
+@lru_cache(maxsize=1)
+def _effective_today(_minute_bucket: int) -> date:
     offset = settings.sandbox_current_day_offset
     if offset <= 0:
         return date.today()
     return date.today() - timedelta(days=offset)
+
+
+def get_effective_today() -> date:
+    """Return the logical "today" taking sandbox offset into account.
+
+    Memoized per wall-clock minute so tight bulk loops don't redo the
+    offset/date math thousands of times for the same answer.
+    """
+    return _effective_today(int(time.time() // 60))
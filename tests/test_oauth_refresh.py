@@ -14,13 +14,13 @@ class DummyResp:
             raise ValueError("No JSON")
         return self._json
 
-@patch("app.auth.oauth.requests.post")
+@patch("app.auth.oauth._token_session.post")
 def test_refresh_success(mock_post):
     mock_post.return_value = DummyResp(200, {"access_token": "new-access", "refresh_token": "new-refresh", "expires_in": 3600})
     token = oauth.refresh_token(DUMMY_REFRESH)
     assert token["access_token"] == "new-access"
 
-@patch("app.auth.oauth.requests.post")
+@patch("app.auth.oauth._token_session.post")
 def test_refresh_http_error(mock_post):
     mock_post.return_value = DummyResp(400, {"error": "invalid_grant"})
     try:
@@ -29,7 +29,7 @@ def test_refresh_http_error(mock_post):
     except RuntimeError as e:
         assert "HTTP 400" in str(e)
 
-@patch("app.auth.oauth.requests.post")
+@patch("app.auth.oauth._token_session.post")
 def test_refresh_non_json_body(mock_post):
     mock_post.return_value = DummyResp(200, None, text_data="<html>Error</html>")
     try:
@@ -30,7 +30,7 @@ class FakeSession:
         self.added = []
         self.commits = 0
 
-    def execute(self, _stmt):
+    def execute(self, _stmt, _params=None):
         if not self._responses:
             return FakeResult([])
         return self._responses.pop(0)
@@ -53,24 +53,29 @@ def _session_scope(session: FakeSession):
     yield session
 
 
+def _fake_best_baselines(baseline_means):
+    def fake(_athlete_id, metric_names, _window_priority):
+        return {
+            name: SimpleNamespace(mean=baseline_means[name])
+            for name in metric_names
+            if name in baseline_means
+        }
+
+    return fake
+
+
 def test_recovery_alert_triggers_and_logs(monkeypatch):
     metric_row = SimpleNamespace(hrv=70.0, sleep_hours=7.0, rhr=44.0)
     session = FakeSession([
-        FakeResult([metric_row]),
-        FakeResult([]),
+        FakeResult([(metric_row, False)]),
     ])
 
     monkeypatch.setattr(recovery_alerts, "get_session", lambda: _session_scope(session))
 
     baseline_means = {"hrv": 80.0, "sleep_hours": 8.0, "rhr": 40.0}
-
-    def fake_get_baseline(_athlete_id, metric_name, _window):
-        mean = baseline_means.get(metric_name)
-        if mean is None:
-            return None
-        return SimpleNamespace(mean=mean)
-
-    monkeypatch.setattr(recovery_alerts, "get_baseline", fake_get_baseline)
+    monkeypatch.setattr(
+        recovery_alerts, "get_best_baselines", _fake_best_baselines(baseline_means)
+    )
 
     sent_messages = []
 
@@ -78,7 +83,11 @@ def test_recovery_alert_triggers_and_logs(monkeypatch):
         sent_messages.append((to_email, subject, body))
         return {"status": "mocked"}
 
-    monkeypatch.setattr(recovery_alerts.email_client, "send_daily_summary", fake_send)
+    monkeypatch.setattr(
+        recovery_alerts,
+        "get_email_client",
+        lambda: SimpleNamespace(send_daily_summary=fake_send),
+    )
 
     result = recovery_alerts.evaluate_recovery_alert(
         athlete_id=1,
@@ -97,17 +106,19 @@ def test_recovery_alert_triggers_and_logs(monkeypatch):
 def test_recovery_alert_skips_without_baseline(monkeypatch):
     metric_row = SimpleNamespace(hrv=70.0, sleep_hours=7.0, rhr=44.0)
     session = FakeSession([
-        FakeResult([metric_row]),
+        FakeResult([(metric_row, False)]),
     ])
 
     monkeypatch.setattr(recovery_alerts, "get_session", lambda: _session_scope(session))
-    monkeypatch.setattr(recovery_alerts, "get_baseline", lambda *_args: None)
+    monkeypatch.setattr(recovery_alerts, "get_best_baselines", lambda *_args: {})
 
     sent_messages = []
     monkeypatch.setattr(
-        recovery_alerts.email_client,
-        "send_daily_summary",
-        lambda *_args, **_kwargs: sent_messages.append(_args) or {"status": "mocked"},
+        recovery_alerts,
+        "get_email_client",
+        lambda: SimpleNamespace(
+            send_daily_summary=lambda *_args, **_kwargs: sent_messages.append(_args) or {"status": "mocked"}
+        ),
     )
 
     result = recovery_alerts.evaluate_recovery_alert(
@@ -125,27 +136,23 @@ def test_recovery_alert_skips_without_baseline(monkeypatch):
 def test_recovery_alert_triggers_on_sleep_only(monkeypatch):
     metric_row = SimpleNamespace(hrv=80.0, sleep_hours=6.0, rhr=40.0)
     session = FakeSession([
-        FakeResult([metric_row]),
-        FakeResult([]),
+        FakeResult([(metric_row, False)]),
     ])
 
     monkeypatch.setattr(recovery_alerts, "get_session", lambda: _session_scope(session))
 
     baseline_means = {"hrv": 80.0, "sleep_hours": 8.0, "rhr": 40.0}
-
-    def fake_get_baseline(_athlete_id, metric_name, _window):
-        mean = baseline_means.get(metric_name)
-        if mean is None:
-            return None
-        return SimpleNamespace(mean=mean)
-
-    monkeypatch.setattr(recovery_alerts, "get_baseline", fake_get_baseline)
+    monkeypatch.setattr(
+        recovery_alerts, "get_best_baselines", _fake_best_baselines(baseline_means)
+    )
 
     sent_messages = []
     monkeypatch.setattr(
-        recovery_alerts.email_client,
-        "send_daily_summary",
-        lambda to_email, subject, body: sent_messages.append((to_email, subject, body)) or {"status": "mocked"},
+        recovery_alerts,
+        "get_email_client",
+        lambda: SimpleNamespace(
+            send_daily_summary=lambda to_email, subject, body: sent_messages.append((to_email, subject, body)) or {"status": "mocked"}
+        ),
     )
 
     result = recovery_alerts.evaluate_recovery_alert(
@@ -163,26 +170,23 @@ def test_recovery_alert_triggers_on_sleep_only(monkeypatch):
 def test_recovery_alert_requires_hrv_and_rhr(monkeypatch):
     metric_row = SimpleNamespace(hrv=70.0, sleep_hours=8.0, rhr=40.0)
     session = FakeSession([
-        FakeResult([metric_row]),
+        FakeResult([(metric_row, False)]),
     ])
 
     monkeypatch.setattr(recovery_alerts, "get_session", lambda: _session_scope(session))
 
     baseline_means = {"hrv": 80.0, "sleep_hours": 8.0, "rhr": 40.0}
-
-    def fake_get_baseline(_athlete_id, metric_name, _window):
-        mean = baseline_means.get(metric_name)
-        if mean is None:
-            return None
-        return SimpleNamespace(mean=mean)
-
-    monkeypatch.setattr(recovery_alerts, "get_baseline", fake_get_baseline)
+    monkeypatch.setattr(
+        recovery_alerts, "get_best_baselines", _fake_best_baselines(baseline_means)
+    )
 
     sent_messages = []
     monkeypatch.setattr(
-        recovery_alerts.email_client,
-        "send_daily_summary",
-        lambda *_args, **_kwargs: sent_messages.append(_args) or {"status": "mocked"},
+        recovery_alerts,
+        "get_email_client",
+        lambda: SimpleNamespace(
+            send_daily_summary=lambda *_args, **_kwargs: sent_messages.append(_args) or {"status": "mocked"}
+        ),
     )
 
     result = recovery_alerts.evaluate_recovery_alert(
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.tables import BaselineMetric, DailyMetric
+from app.services import baseline
+
+
+def _make_db(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, future=True)
+
+    @contextmanager
+    def session_scope():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(baseline, "get_session", session_scope)
+    return factory
+
+
+def _add_day(factory, day: date, hrv: float):
+    with factory() as session:
+        session.add(DailyMetric(athlete_id=1, date=day, hrv=hrv, rhr=45.0, sleep_hours=8.0))
+        session.commit()
+
+
+def _set_hrv(factory, day: date, hrv: float):
+    with factory() as session:
+        session.execute(
+            update(DailyMetric)
+            .where(DailyMetric.athlete_id == 1, DailyMetric.date == day)
+            .values(hrv=hrv)
+        )
+        session.commit()
+
+
+def _rolling_row(factory, window_type: str) -> BaselineMetric:
+    with factory() as session:
+        return session.query(BaselineMetric).filter_by(
+            athlete_id=1, metric_name="hrv", window_type=window_type
+        ).one()
+
+
+def _non_resync_start() -> date:
+    """A start date such that day 0 is not a forced-resync day."""
+    day = date(2026, 3, 2)
+    while day.toordinal() % baseline._ROLLING_RESYNC_DAYS == 0:
+        day += timedelta(days=1)
+    return day
+
+
+def test_rolling_incremental_advance(monkeypatch):
+    factory = _make_db(monkeypatch)
+    start = _non_resync_start()
+    for i in range(8):
+        _add_day(factory, start + timedelta(days=i), hrv=60.0 + i)
+        result = baseline.update_rolling_baselines(1, start + timedelta(days=i))
+
+    # Day 8 window covers days 1..7 (values 61..67)
+    assert result["hrv"]["rolling_7"]["sample_count"] == 7
+    assert result["hrv"]["rolling_7"]["mean"] == 64.0
+
+    row = _rolling_row(factory, "rolling_7")
+    assert row.window_end_date == start + timedelta(days=7)
+    state = row.internal_state
+    assert state["n"] == 7
+    # Per-day contributions are kept for later evictions
+    assert state["values"][(start + timedelta(days=7)).isoformat()] == 67.0
+    assert (start).isoformat() not in state["values"]  # evicted day dropped
+
+
+def test_rolling_eviction_uses_originally_folded_value(monkeypatch):
+    factory = _make_db(monkeypatch)
+    start = _non_resync_start()
+    for i in range(7):
+        _add_day(factory, start + timedelta(days=i), hrv=60.0)
+        baseline.update_rolling_baselines(1, start + timedelta(days=i))
+
+    # Revise an in-window day after it was folded into the running sums
+    _set_hrv(factory, start + timedelta(days=2), 100.0)
+
+    # Advance until the revised day has left the 7-day window; every new
+    # day is 60, so once it is gone the true window is all 60s
+    means = []
+    for i in range(7, 16):
+        day = start + timedelta(days=i)
+        _add_day(factory, day, hrv=60.0)
+        result = baseline.update_rolling_baselines(1, day)
+        if day - timedelta(days=6) > start + timedelta(days=2):
+            means.append(
+                (result["hrv"]["rolling_7"]["mean"], result["hrv"]["rolling_7"]["std_dev"])
+            )
+
+    # The old bug subtracted the revised DB value (100) instead of the
+    # folded one (60), corrupting sum/sumsq forever
+    assert means and all(m == (60.0, 0.0) for m in means), means
+
+
+def test_rolling_rebuild_after_gap(monkeypatch):
+    factory = _make_db(monkeypatch)
+    start = _non_resync_start()
+    for i in range(5):
+        _add_day(factory, start + timedelta(days=i), hrv=60.0)
+        baseline.update_rolling_baselines(1, start + timedelta(days=i))
+
+    # Three days with no update call, then new data: the incremental path
+    # requires window_end_date == end_date - 1, so this must rebuild
+    resume = start + timedelta(days=8)
+    _add_day(factory, resume, hrv=90.0)
+    result = baseline.update_rolling_baselines(1, resume)
+
+    # Window covers days 2..8: three 60s survive plus the new 90
+    assert result["hrv"]["rolling_7"]["sample_count"] == 4
+    assert result["hrv"]["rolling_7"]["mean"] == (3 * 60.0 + 90.0) / 4
+    state = _rolling_row(factory, "rolling_7").internal_state
+    assert set(state["values"]) == {
+        (start + timedelta(days=i)).isoformat() for i in (2, 3, 4)
+    } | {resume.isoformat()}
+
+
+def test_rolling_resync_picks_up_revised_values(monkeypatch):
+    factory = _make_db(monkeypatch)
+    start = _non_resync_start()
+    # Find the first forced-resync day at least 3 days in, and seed up to it
+    resync_day = start + timedelta(days=1)
+    while resync_day.toordinal() % baseline._ROLLING_RESYNC_DAYS != 0 or (resync_day - start).days < 3:
+        resync_day += timedelta(days=1)
+
+    day = start
+    while day < resync_day:
+        _add_day(factory, day, hrv=60.0)
+        baseline.update_rolling_baselines(1, day)
+        day += timedelta(days=1)
+
+    # Revise an in-window day; the incremental path keeps the folded 60,
+    # but the resync day forces a rebuild that sees the 100
+    _set_hrv(factory, start + timedelta(days=1), 100.0)
+    _add_day(factory, resync_day, hrv=60.0)
+    result = baseline.update_rolling_baselines(1, resync_day)
+
+    n = result["hrv"]["rolling_7"]["sample_count"]
+    assert result["hrv"]["rolling_7"]["mean"] == (100.0 + (n - 1) * 60.0) / n